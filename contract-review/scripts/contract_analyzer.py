@@ -7,15 +7,284 @@
 为批注提供智能搜索关键词或行号定位。
 """
 
+import bisect
+import hashlib
+import os
 import subprocess
 import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
-from defusedxml import minidom
+from defusedxml import DefusedXmlException, minidom
+from defusedxml import ElementTree as DefusedET
+
+
+# pandoc提取结果的磁盘缓存目录
+PANDOC_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "contract-review"
+# 磁盘缓存最多保留的条目数,超出时删除最早写入的条目
+PANDOC_CACHE_MAX_ENTRIES = 256
+# 超过该时长(秒)的缓存条目在写入新条目时删除
+PANDOC_CACHE_MAX_AGE = 30 * 24 * 3600
+
+
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P = f"{_W_NS}p"
+_W_T = f"{_W_NS}t"
+# 段内的制表符与换行
+_W_INLINE_BREAKS = {f"{_W_NS}tab": "\t", f"{_W_NS}br": "\n", f"{_W_NS}cr": "\n"}
+
+
+@lru_cache(maxsize=128)
+def _extract_plain_text(resolved_path: str, mtime_ns: int, size: int) -> str:
+    """
+    提取合同纯文本,按(路径, 修改时间, 文件大小)缓存
+
+    以pandoc plain输出为准(段落行号均据此计算);仅在未安装pandoc时
+    回退到进程内解析docx,此时表格不渲染、长段落不折行,行号与pandoc输出不同。
+    """
+    try:
+        return _extract_with_pandoc(resolved_path, mtime_ns, size)
+    except FileNotFoundError as missing_pandoc:
+        try:
+            return _extract_docx_text(resolved_path)
+        except (OSError, KeyError, zipfile.BadZipFile, DefusedET.ParseError, DefusedXmlException):
+            raise missing_pandoc from None
+
+
+def _extract_docx_text(path: str) -> str:
+    """
+    流式解析word/document.xml,每个段落输出为一段,段落之间空一行
+
+    仅作为未安装pandoc时的后备:表格单元格内的段落逐段输出,不渲染为表格线框,
+    也不按72列折行,因此行号与pandoc plain输出不一致。
+    """
+    paragraphs = []
+    stack = []  # 嵌套段落(如文本框)各自收集文本
+    with zipfile.ZipFile(path) as docx, docx.open("word/document.xml") as fh:
+        for event, elem in DefusedET.iterparse(fh, events=("start", "end")):
+            tag = elem.tag
+            if tag == _W_P:
+                if event == "start":
+                    stack.append([])
+                else:
+                    text = "".join(stack.pop()).strip()
+                    if text:
+                        paragraphs.append(text)
+                    elem.clear()
+            elif event == "end" and stack:
+                if tag == _W_T:
+                    stack[-1].append(elem.text or "")
+                elif tag in _W_INLINE_BREAKS:
+                    stack[-1].append(_W_INLINE_BREAKS[tag])
+    return "\n\n".join(paragraphs) + "\n" if paragraphs else ""
+
+
+def _extract_with_pandoc(resolved_path: str, mtime_ns: int, size: int) -> str:
+    """
+    使用pandoc提取纯文本
+
+    结果写入磁盘缓存供其他进程复用,文件被修改后缓存键随之变化,不会读到过期文本。
+    """
+    key = hashlib.blake2b(
+        f"{resolved_path}|{mtime_ns}|{size}".encode("utf-8"), digest_size=16
+    ).hexdigest()
+    cache_file = PANDOC_CACHE_DIR / f"{key}.txt"
+    try:
+        return cache_file.read_text(encoding="utf-8")
+    except OSError:
+        pass
+
+    result = subprocess.run(
+        ["pandoc", "-f", "docx", "-t", "plain", resolved_path],
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=30
+    )
+    if _write_text_cache(cache_file, result.stdout):
+        _prune_text_cache(PANDOC_CACHE_DIR)
+    return result.stdout
+
+
+def _write_text_cache(cache_file: Path, text: str) -> bool:
+    """原子写入缓存文件,写入失败不影响分析流程;返回是否写入成功"""
+    tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file.write_text(text, encoding="utf-8")
+        tmp_file.replace(cache_file)
+        return True
+    except OSError:
+        try:
+            tmp_file.unlink(missing_ok=True)
+        except OSError:
+            pass
+        return False
+
+
+def _prune_text_cache(cache_dir: Path) -> None:
+    """写入新条目后清理缓存:删除过期条目,并把条目数限制在上限以内"""
+    try:
+        with os.scandir(cache_dir) as it:
+            entries = [(entry.stat().st_mtime, entry.path) for entry in it if entry.name.endswith(".txt")]
+    except OSError:
+        return
+    cutoff = time.time() - PANDOC_CACHE_MAX_AGE
+    entries.sort(reverse=True)
+    for index, (mtime, path) in enumerate(entries):
+        if index >= PANDOC_CACHE_MAX_ENTRIES or mtime < cutoff:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+# 合同类型识别的关键词匹配规则
+CONTRACT_TYPE_KEYWORDS = {
+    "training": ["培训", "训练", "课程", "讲师", "学员"],
+    "purchase": ["采购", "购销", "买方", "卖方", "订购", "货物"],
+    "service": ["服务", "提供", "服务费", "维护", "技术支持"],
+    "cooperation": ["合作", "推广", "联合", "协议", "框架"],
+}
+
+# 常见字段及其可能的表述,支持中英文标点符号变体
+COMMON_FIELDS = {
+    "合同编号": [
+        "合同编号:", "协议编号:", "合同号:", "协议号:", "编号:",
+        "合同编号：", "协议编号：", "合同号：", "协议号：", "编号：",  # 中文冒号
+    ],
+    "合同金额": [
+        "合同总金额", "协议总金额", "合同价款", "协议价款", "费用总额", "总金额",
+        "¥", "人民币", "元",  # 金额符号
+    ],
+    "签署日期": [
+        "签署日期", "签订日期", "签约日期", "签署时间", "生效日期",
+        "签署日期：", "签订日期：",  # 中文冒号
+    ],
+    "甲方": [
+        "甲方:", "甲方（", "需方:", "买方:", "委托方:",
+        "甲方：", "甲方（", "需方：",  # 中文冒号
+    ],
+    "乙方": [
+        "乙方:", "乙方（", "供方:", "卖方:", "服务方:",
+        "乙方：", "乙方（", "供方：",  # 中文冒号
+    ],
+    "违约责任": [
+        "违约责任", "违约金", "赔偿责任", "赔偿条款",
+        "违约责任：", "违约金：",  # 中文冒号
+    ],
+    "争议解决": [
+        "争议解决", "纠纷解决", "管辖", "诉讼", "仲裁",
+        "争议解决：",  # 中文冒号
+    ],
+    "保密条款": [
+        "保密", "商业秘密", "保密义务", "保密条款",
+        "保密：",  # 中文冒号
+    ],
+}
+
+
+# 不超过该数量的关键词定位改用逐个str.find,多于该数量时单个正则扫描更快
+_FIND_MAX_KEYWORDS = 6
+
+
+class _KeywordMatcher:
+    """
+    多关键词单遍匹配器
+
+    所有关键词编译为一个长词优先的正则,一次扫描全文即可得到命中集合,
+    代替逐个关键词的子串查找。
+    """
+
+    def __init__(self, keywords: Tuple[str, ...]):
+        unique = sorted({k for k in keywords if k}, key=len, reverse=True)
+        self.keywords = tuple(unique)
+        self.pattern = re.compile("|".join(re.escape(k) for k in unique)) if unique else None
+        # 命中某个关键词即意味着其所有子串关键词同样出现在文本中
+        self.contained = {k: [c for c in unique if c in k] for k in unique}
+        # 可能跨越另一关键词结尾的关键词,扫描时会被跳过,需单独确认
+        self.straddling = [
+            k for k in unique
+            if any(
+                k not in other and any(k.startswith(other[i:]) for i in range(1, len(other)))
+                for other in unique
+            )
+        ]
+
+    def hits(self, text: str) -> set:
+        """返回文本中出现过的全部关键词"""
+        found = set()
+        if self.pattern is None:
+            return found
+        for match in self.pattern.finditer(text):
+            keyword = match.group()
+            if keyword not in found:
+                found.update(self.contained[keyword])
+        for keyword in self.straddling:
+            if keyword not in found and keyword in text:
+                found.add(keyword)
+        return found
+
+    def first_offset(self, text: str) -> int:
+        """返回任一关键词最早出现的位置,未出现返回-1"""
+        if self.pattern is None:
+            return -1
+        if len(self.keywords) > _FIND_MAX_KEYWORDS:
+            match = self.pattern.search(text)
+            return match.start() if match else -1
+
+        # 关键词较少时逐个str.find更快;已有命中后只需在其之前继续查找
+        best = -1
+        for keyword in self.keywords:
+            end = len(text) if best < 0 else best + len(keyword) - 1
+            pos = text.find(keyword, 0, end)
+            if pos >= 0:
+                best = pos
+        return best
+
+
+@lru_cache(maxsize=256)
+def _keyword_matcher(keywords: Tuple[str, ...]) -> _KeywordMatcher:
+    return _KeywordMatcher(keywords)
+
+
+_CONTRACT_TYPE_MATCHER = _KeywordMatcher(
+    tuple(keyword for keywords in CONTRACT_TYPE_KEYWORDS.values() for keyword in keywords)
+)
+
+_COMMON_FIELDS_MATCHER = _KeywordMatcher(
+    tuple(keyword for keywords in COMMON_FIELDS.values() for keyword in keywords)
+)
+
+
+def _build_field_slots() -> Dict[str, Tuple[Tuple[int, str, str], ...]]:
+    """关键词 -> 其在COMMON_FIELDS中的声明位置 (序号, 字段名, 关键词),重复声明各占一项"""
+    slots = {}
+    declared = (
+        (field_name, keyword)
+        for field_name, keywords in COMMON_FIELDS.items()
+        for keyword in keywords
+    )
+    for position, (field_name, keyword) in enumerate(declared):
+        slots[keyword] = slots.get(keyword, ()) + ((position, field_name, keyword),)
+    return slots
+
+
+KW_TO_FIELDS = _build_field_slots()
 
 
 class ContractAnalyzer:
-    """合同智能分析器"""
+    """
+    合同智能分析器
+
+    全文、段落、合同类型、常见字段和智能搜索关键词均为惰性属性,
+    首次访问时计算并缓存,同一实例内只计算一次。
+    """
+
+    _DERIVED_PROPERTIES = ("paragraphs", "contract_type", "common_fields", "smart_keywords")
 
     def __init__(self, contract_path: str):
         """
@@ -25,28 +294,87 @@ class ContractAnalyzer:
             contract_path: 合同文件路径
         """
         self.contract_path = Path(contract_path)
-        self.full_text = ""
-        self.paragraphs = []
-        self.contract_type = "unknown"
         self.key_clauses = {}
+        self._line_starts = None  # type: Optional[List[int]]
+        self._clause_cache = {}  # type: Dict[Tuple[str, ...], Optional[int]]
+
+    @cached_property
+    def full_text(self) -> str:
+        """合同纯文本,首次访问时提取"""
+        return self._read_text()
+
+    @cached_property
+    def paragraphs(self) -> List[Tuple[int, str]]:
+        """非空段落及对应行号 [(行号, 段落文本), ...]"""
+        paragraphs = []
+        for i, line in enumerate(self.full_text.split('\n'), 1):
+            stripped = line.strip()
+            if stripped:  # 跳过空行
+                paragraphs.append((i, stripped))
+        return paragraphs
 
-    def extract_text(self) -> str:
-        """
-        使用pandoc提取合同纯文本
+    @cached_property
+    def contract_type(self) -> str:
+        """合同类型 (training/purchase/service/cooperation/unknown)"""
+        # 关键词均为中文,无需转小写;单遍扫描全文得到命中关键词
+        hits = _CONTRACT_TYPE_MATCHER.hits(self.full_text)
+
+        # 统计每种类型命中的关键词个数
+        type_scores = {}
+        for contract_type, keywords in CONTRACT_TYPE_KEYWORDS.items():
+            score = sum(1 for keyword in keywords if keyword in hits)
+            if score > 0:
+                type_scores[contract_type] = score
+
+        # 返回得分最高的类型
+        if type_scores:
+            return max(type_scores, key=type_scores.get)
+        return "unknown"
+
+    @cached_property
+    def common_fields(self) -> Dict[str, List[str]]:
+        """合同中出现的常见字段及其关键词"""
+        # 经反向索引只处理命中的关键词,按声明位置排序后字段与关键词顺序均与声明一致
+        hits = _COMMON_FIELDS_MATCHER.hits(self.full_text)
+        slots = sorted(slot for keyword in hits for slot in KW_TO_FIELDS[keyword])
+        found_fields = {}
+        for _, field_name, keyword in slots:
+            found_fields.setdefault(field_name, []).append(keyword)
+        return found_fields
+
+    @cached_property
+    def smart_keywords(self) -> Dict[str, List[str]]:
+        """常见审核点到搜索关键词的映射"""
+        common_fields = self.common_fields
+        return {
+            "合同编号为空": common_fields.get("合同编号", ["合同编号:", "协议编号:"]),
+            "金额表述不一致": common_fields.get("合同金额", ["合同总金额", "总金额", "¥"]),
+            "签署日期": common_fields.get("签署日期", ["签署日期", "签订日期"]),
+            "甲方信息": common_fields.get("甲方", ["甲方:"]),
+            "乙方信息": common_fields.get("乙方", ["乙方:"]),
+            "违约责任条款": common_fields.get("违约责任", ["违约责任", "违约金"]),
+            "争议解决条款": common_fields.get("争议解决", ["争议解决", "协商"]),
+            "保密条款": common_fields.get("保密条款", ["保密", "商业秘密"]),
+        }
+
+    def _reset_derived(self):
+        """清空基于全文计算出的缓存结果(全文变化时调用)"""
+        for name in self._DERIVED_PROPERTIES:
+            self.__dict__.pop(name, None)
+        self._line_starts = None
+        self._clause_cache = {}
+
+    def _read_text(self) -> str:
+        try:
+            stat = self.contract_path.stat()
+        except OSError as e:
+            print(f"⚠️  读取合同文件失败: {e}")
+            return ""
 
-        Returns:
-            str: 合同的纯文本内容
-        """
         try:
-            result = subprocess.run(
-                ["pandoc", "-f", "docx", "-t", "plain", str(self.contract_path)],
-                capture_output=True,
-                text=True,
-                check=True,
-                timeout=30
+            return _extract_plain_text(
+                str(self.contract_path.resolve()), stat.st_mtime_ns, stat.st_size
             )
-            self.full_text = result.stdout
-            return self.full_text
         except subprocess.CalledProcessError as e:
             print(f"⚠️  pandoc提取失败: {e}")
             return ""
@@ -57,6 +385,20 @@ class ContractAnalyzer:
             print(f"⚠️  未找到pandoc命令,请先安装: sudo apt-get install pandoc")
             return ""
 
+    def extract_text(self) -> str:
+        """
+        重新提取合同纯文本,并清空基于旧文本的分析结果
+
+        使用pandoc提取,未安装pandoc时回退到进程内解析docx(行号会与pandoc输出不同)。
+        同一文件(路径、修改时间、大小均未变化)的提取结果会被缓存。
+
+        Returns:
+            str: 合同的纯文本内容
+        """
+        self.full_text = self._read_text()
+        self._reset_derived()
+        return self.full_text
+
     def extract_paragraphs_with_line_numbers(self) -> List[Tuple[int, str]]:
         """
         提取段落文本及对应的行号
@@ -64,18 +406,22 @@ class ContractAnalyzer:
         Returns:
             List[Tuple[int, str]]: [(行号, 段落文本), ...]列表
         """
-        if not self.full_text:
-            self.extract_text()
-
-        lines = self.full_text.split('\n')
-        self.paragraphs = []
+        return self.paragraphs
 
-        for i, line in enumerate(lines, 1):
-            stripped = line.strip()
-            if stripped:  # 跳过空行
-                self.paragraphs.append((i, stripped))
+    def _get_line_starts(self) -> List[int]:
+        """
+        返回每行在全文中的起始偏移,用于把字符偏移换算为行号
 
-        return self.paragraphs
+        直接用str.find逐个定位换行符,不拆分全文,也不生成段落列表。
+        """
+        if self._line_starts is None:
+            text = self.full_text
+            line_starts = [0]
+            i = -1
+            while (i := text.find('\n', i + 1)) != -1:
+                line_starts.append(i + 1)
+            self._line_starts = line_starts
+        return self._line_starts
 
     def identify_contract_type(self) -> str:
         """
@@ -84,32 +430,6 @@ class ContractAnalyzer:
         Returns:
             str: 合同类型 (training/purchase/service/cooperation/unknown)
         """
-        if not self.full_text:
-            self.extract_text()
-
-        text_lower = self.full_text.lower()
-
-        # 关键词匹配规则
-        type_keywords = {
-            "training": ["培训", "训练", "课程", "讲师", "学员"],
-            "purchase": ["采购", "购销", "买方", "卖方", "订购", "货物"],
-            "service": ["服务", "提供", "服务费", "维护", "技术支持"],
-            "cooperation": ["合作", "推广", "联合", "协议", "框架"],
-        }
-
-        # 统计每种类型的关键词出现次数
-        type_scores = {}
-        for contract_type, keywords in type_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower)
-            if score > 0:
-                type_scores[contract_type] = score
-
-        # 返回得分最高的类型
-        if type_scores:
-            self.contract_type = max(type_scores, key=type_scores.get)
-        else:
-            self.contract_type = "unknown"
-
         return self.contract_type
 
     def find_clause_location(self, search_keywords: List[str]) -> Optional[int]:
@@ -122,16 +442,20 @@ class ContractAnalyzer:
         Returns:
             Optional[int]: 找到的行号,未找到返回None
         """
-        if not self.paragraphs:
-            self.extract_paragraphs_with_line_numbers()
-
-        # 遍历所有段落,查找包含任一关键词的段落
-        for line_num, paragraph in self.paragraphs:
-            for keyword in search_keywords:
-                if keyword in paragraph:
-                    return line_num
+        cache_key = tuple(search_keywords)
+        if cache_key in self._clause_cache:
+            return self._clause_cache[cache_key]
+
+        # 单遍扫描全文,取任一关键词最早出现的位置,再换算为行号
+        keywords = tuple(k for k in cache_key if "\n" not in k)
+        offset = _keyword_matcher(keywords).first_offset(self.full_text)
+        if offset < 0:
+            line_num = None
+        else:
+            line_num = bisect.bisect_right(self._get_line_starts(), offset)
 
-        return None
+        self._clause_cache[cache_key] = line_num
+        return line_num
 
     def analyze_common_fields(self) -> Dict[str, List[str]]:
         """
@@ -142,56 +466,7 @@ class ContractAnalyzer:
         Returns:
             Dict[str, List[str]]: 字段名到关键词列表的映射
         """
-        if not self.full_text:
-            self.extract_text()
-
-        # 定义常见字段,支持中英文标点符号变体
-        common_fields = {
-            "合同编号": [
-                "合同编号:", "协议编号:", "合同号:", "协议号:", "编号:",
-                "合同编号：", "协议编号：", "合同号：", "协议号：", "编号：",  # 中文冒号
-            ],
-            "合同金额": [
-                "合同总金额", "协议总金额", "合同价款", "协议价款", "费用总额", "总金额",
-                "¥", "人民币", "元",  # 金额符号
-            ],
-            "签署日期": [
-                "签署日期", "签订日期", "签约日期", "签署时间", "生效日期",
-                "签署日期：", "签订日期：",  # 中文冒号
-            ],
-            "甲方": [
-                "甲方:", "甲方（", "需方:", "买方:", "委托方:",
-                "甲方：", "甲方（", "需方：",  # 中文冒号
-            ],
-            "乙方": [
-                "乙方:", "乙方（", "供方:", "卖方:", "服务方:",
-                "乙方：", "乙方（", "供方：",  # 中文冒号
-            ],
-            "违约责任": [
-                "违约责任", "违约金", "赔偿责任", "赔偿条款",
-                "违约责任：", "违约金：",  # 中文冒号
-            ],
-            "争议解决": [
-                "争议解决", "纠纷解决", "管辖", "诉讼", "仲裁",
-                "争议解决：",  # 中文冒号
-            ],
-            "保密条款": [
-                "保密", "商业秘密", "保密义务", "保密条款",
-                "保密：",  # 中文冒号
-            ],
-        }
-
-        # 检查每个字段在合同中的实际表述
-        found_fields = {}
-        for field_name, keywords in common_fields.items():
-            found_keywords = []
-            for keyword in keywords:
-                if keyword in self.full_text:
-                    found_keywords.append(keyword)
-            if found_keywords:
-                found_fields[field_name] = found_keywords
-
-        return found_fields
+        return self.common_fields
 
     def generate_smart_search_keywords(self) -> Dict[str, List[str]]:
         """
@@ -202,22 +477,7 @@ class ContractAnalyzer:
         Returns:
             Dict[str, List[str]]: 审核点到关键词列表的映射
         """
-        # 先分析常见字段
-        common_fields = self.analyze_common_fields()
-
-        # 生成智能搜索关键词映射
-        smart_keywords = {
-            "合同编号为空": common_fields.get("合同编号", ["合同编号:", "协议编号:"]),
-            "金额表述不一致": common_fields.get("合同金额", ["合同总金额", "总金额", "¥"]),
-            "签署日期": common_fields.get("签署日期", ["签署日期", "签订日期"]),
-            "甲方信息": common_fields.get("甲方", ["甲方:"]),
-            "乙方信息": common_fields.get("乙方", ["乙方:"]),
-            "违约责任条款": common_fields.get("违约责任", ["违约责任", "违约金"]),
-            "争议解决条款": common_fields.get("争议解决", ["争议解决", "协商"]),
-            "保密条款": common_fields.get("保密条款", ["保密", "商业秘密"]),
-        }
-
-        return smart_keywords
+        return self.smart_keywords
 
     def get_contract_summary(self) -> Dict:
         """
@@ -226,26 +486,40 @@ class ContractAnalyzer:
         Returns:
             Dict: 包含合同类型、关键词字段等信息的字典
         """
-        if not self.full_text:
-            self.extract_text()
-
-        if not self.paragraphs:
-            self.extract_paragraphs_with_line_numbers()
-
-        if self.contract_type == "unknown":
-            self.identify_contract_type()
-
-        smart_keywords = self.generate_smart_search_keywords()
-
         return {
             "contract_type": self.contract_type,
             "total_paragraphs": len(self.paragraphs),
             "text_length": len(self.full_text),
-            "smart_keywords": smart_keywords,
-            "found_fields": len(smart_keywords)
+            "smart_keywords": self.smart_keywords,
+            "found_fields": len(self.smart_keywords)
         }
 
 
+def _summarize_contract(contract_path: str) -> Dict:
+    return ContractAnalyzer(contract_path).get_contract_summary()
+
+
+def analyze_many(contract_paths: List[str], workers: Optional[int] = None) -> List[Dict]:
+    """
+    并行分析多份合同
+
+    各合同互不依赖,使用进程池分别提取文本并生成摘要。
+
+    Args:
+        contract_paths: 合同文件路径列表
+        workers: 进程数,默认为CPU核数
+
+    Returns:
+        List[Dict]: 与输入顺序一致的合同摘要列表
+    """
+    workers = min(workers or os.cpu_count() or 1, len(contract_paths))
+    if workers <= 1:
+        return [_summarize_contract(path) for path in contract_paths]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_summarize_contract, contract_paths))
+
+
 def demo():
     """演示合同分析功能"""
     # 示例用法
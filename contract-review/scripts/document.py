@@ -6,12 +6,18 @@ Minimal DOCX comment editor for contract review.
 
 from __future__ import annotations
 
+import bisect
 import html
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.sax.handler import ContentHandler, feature_namespaces
 
-from .utilities import XMLEditor
+from defusedxml import sax as defused_sax
+from lxml import etree
+
+from .utilities import _PARSER, XMLEditor
 
 COMMENTS_CONTENT_TYPE = (
     "application/vnd.openxmlformats-officedocument.wordprocessingml.comments+xml"
@@ -20,6 +26,42 @@ COMMENTS_REL_TYPE = (
     "http://schemas.openxmlformats.org/officeDocument/2006/relationships/comments"
 )
 
+WORDML_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+PACKAGE_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+
+W_P = f"{{{WORDML_NS}}}p"
+W_R = f"{{{WORDML_NS}}}r"
+W_T = f"{{{WORDML_NS}}}t"
+W_ID = f"{{{WORDML_NS}}}id"
+W_AUTHOR = f"{{{WORDML_NS}}}author"
+W_INITIALS = f"{{{WORDML_NS}}}initials"
+W_DATE = f"{{{WORDML_NS}}}date"
+W_COMMENT = f"{{{WORDML_NS}}}comment"
+W_COMMENT_RANGE_START = f"{{{WORDML_NS}}}commentRangeStart"
+W_COMMENT_RANGE_END = f"{{{WORDML_NS}}}commentRangeEnd"
+W_COMMENT_REFERENCE = f"{{{WORDML_NS}}}commentReference"
+_SPACE_PRESERVE = ' xml:space="preserve"'
+RELATIONSHIP = f"{{{PACKAGE_REL_NS}}}Relationship"
+OVERRIDE = f"{{{CONTENT_TYPES_NS}}}Override"
+
+RISK_REVIEWERS = {
+    "高风险": {"author": "高风险", "initials": "高风险"},
+    "中风险": {"author": "中风险", "initials": "中风险"},
+    "低风险": {"author": "低风险", "initials": "低风险"},
+}
+ENGLISH_REVIEWERS = {
+    "high": {"author": "High Risk", "initials": "H"},
+    "medium": {"author": "Medium Risk", "initials": "M"},
+    "low": {"author": "Low Risk", "initials": "L"},
+}
+
+_SAX_COMMENT = (WORDML_NS, "comment")
+_SAX_COMMENT_RANGE_START = (WORDML_NS, "commentRangeStart")
+_SAX_T = (WORDML_NS, "t")
+_SAX_ID = (WORDML_NS, "id")
+_SAX_AUTHOR = (WORDML_NS, "author")
+
 
 class Document:
     """Edit an unpacked .docx directory to insert comments."""
@@ -38,6 +80,14 @@ class Document:
         self.author = author
         self.initials = initials
         self._editors: Dict[str, XMLEditor] = {}
+        # document.xml paragraphs, their texts joined by NUL (never valid in XML
+        # text) and each text's offset in the joined string. Comment markup adds
+        # no w:t or w:p, so this stays valid across add_comment calls.
+        self._paragraphs: Optional[List[etree._Element]] = None
+        self._joined_text = ""
+        self._text_starts: List[int] = []
+        # id() of each indexed paragraph; safe because self._paragraphs keeps the proxies alive.
+        self._paragraph_ids: Dict[int, etree._Element] = {}
 
         self._ensure_comments_part()
         self.next_comment_id = self._get_next_comment_id()
@@ -54,77 +104,131 @@ class Document:
             editor.save()
 
     def get_paragraph_text(self, paragraph) -> str:
-        text_parts = []
-        for run in paragraph.getElementsByTagName("w:r"):
-            for text_node in run.getElementsByTagName("w:t"):
-                if text_node.firstChild:
-                    text_parts.append(text_node.firstChild.nodeValue)
-        return "".join(text_parts)
+        return "".join(node.text or "" for node in paragraph.iter(W_T))
 
     def find_paragraph_by_text(self, search_text, allow_fallback: bool = True):
-        editor = self["word/document.xml"]
-        paragraphs = editor.dom.getElementsByTagName("w:p")
+        return self.find_paragraph_with_keyword(search_text, allow_fallback)[0]
+
+    def find_paragraph_with_keyword(self, search_text, allow_fallback: bool = True):
+        """Like find_paragraph_by_text, but return (paragraph, matched keyword).
+
+        The keyword is the first one, in the given order, that the paragraph
+        contains; it is None when the paragraph is the fallback target.
+        """
+        paragraphs = self._build_paragraph_index()
         search_keywords = [search_text] if isinstance(search_text, str) else search_text
 
-        for keyword in search_keywords:
-            for para in paragraphs:
-                if keyword in self.get_paragraph_text(para):
-                    return para
+        # An empty document has no joined text to map positions back from.
+        if paragraphs:
+            for keyword in search_keywords:
+                if "\0" in keyword:
+                    continue
+                pos = self._joined_text.find(keyword)
+                if pos >= 0:
+                    idx = bisect.bisect_right(self._text_starts, pos) - 1
+                    if idx >= 0:
+                        return paragraphs[idx], keyword
 
         if not allow_fallback:
             raise ValueError(f"Paragraph not found for: {search_text}")
 
         for para in paragraphs[:20]:
             if self.get_paragraph_text(para).strip():
-                return para
-        return paragraphs[0] if paragraphs else None
+                return para, None
+        return (paragraphs[0] if paragraphs else None), None
+
+    def _build_paragraph_index(self) -> List[etree._Element]:
+        if self._paragraphs is None:
+            paragraphs = list(self["word/document.xml"].dom.iter(W_P))
+            texts = [self.get_paragraph_text(para) for para in paragraphs]
+            starts = []
+            offset = 0
+            for text in texts:
+                starts.append(offset)
+                offset += len(text) + 1
+            self._paragraphs = paragraphs
+            self._paragraph_ids = {id(para): para for para in paragraphs}
+            self._joined_text = "\0".join(texts)
+            self._text_starts = starts
+        return self._paragraphs
 
     def add_comment(self, start, end, text: str, risk_level: str = "中风险") -> int:
-        _ = end
-        para = self._get_paragraph_node(start)
-        if para is None:
-            raise ValueError("Comment target paragraph not found")
-
-        comment_id = self.next_comment_id
-        self.next_comment_id += 1
-
-        reviewer = self._get_reviewer_by_risk_level(risk_level)
-        author = reviewer["author"]
-        initials = reviewer["initials"]
-        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-
-        self._insert_comment_range(para, comment_id)
-        self._append_comment_reference(para, comment_id)
-        self._append_comment_entry(comment_id, author, initials, timestamp, text)
-
-        return comment_id
+        spec = {"start": start, "end": end, "text": text, "risk_level": risk_level}
+        return self.add_comments([spec])[0]
+
+    def add_comments(self, comments: List[dict]) -> List[int]:
+        """Insert several comments in one pass.
+
+        Each entry takes the add_comment arguments as keys (start, end, text,
+        risk_level). All targets are resolved and all comment entries are built
+        before the tree is touched, so a bad entry leaves the document and
+        next_comment_id unchanged.
+        """
+        targets = []
+        for spec in comments:
+            para = self._get_paragraph_node(spec["start"])
+            if para is None:
+                raise ValueError("Comment target paragraph not found")
+            targets.append(para)
+
+        first_id = self.next_comment_id
+        ids = range(first_id, first_id + len(comments))
+
+        # Comments added in one batch belong to the same review pass and share a timestamp.
+        timestamp = f"{datetime.now(timezone.utc):%Y-%m-%dT%H:%M:%SZ}"
+        entries = []
+        for comment_id, spec in zip(ids, comments):
+            author, initials = _reviewer_for_risk_level(spec.get("risk_level", "中风险"))
+            entries.append(_build_comment_entry(comment_id, author, initials, timestamp, spec["text"]))
+
+        for comment_id, para in zip(ids, targets):
+            self._insert_comment_range(para, comment_id)
+            self._append_comment_reference(para, comment_id)
+        self["word/comments.xml"].dom.getroot().extend(entries)
+        self.next_comment_id = ids.stop
+        return list(ids)
 
     def verify_comments(self) -> dict:
         result = {"total": 0, "found": 0, "missing": 0, "comment_list": []}
         if not self.comments_path.exists():
             return result
 
-        comments_editor = self["word/comments.xml"]
-        comment_nodes = _find_by_local_name(comments_editor.dom, "comment")
-        result["total"] = len(comment_nodes)
+        # Parts that are not loaded yet are streamed instead of building a tree.
+        if "word/comments.xml" in self._editors:
+            comments_editor = self["word/comments.xml"]
+            for node in comments_editor.dom.iter(W_COMMENT):
+                result["comment_list"].append({
+                    "id": node.get(W_ID) or node.get("id"),
+                    "author": node.get(W_AUTHOR) or node.get("author"),
+                    "preview": _extract_first_text(node),
+                })
+        else:
+            result["comment_list"].extend(self.iter_comment_info())
+        result["total"] = len(result["comment_list"])
 
-        document_editor = self["word/document.xml"]
-        range_nodes = _find_by_local_name(document_editor.dom, "commentRangeStart")
-        result["found"] = len(range_nodes)
+        if "word/document.xml" in self._editors:
+            document_editor = self["word/document.xml"]
+            result["found"] = sum(1 for _ in document_editor.dom.iter(W_COMMENT_RANGE_START))
+        else:
+            result["found"] = _stream_part(self.document_path, _CommentInfoHandler()).range_starts
         result["missing"] = max(result["total"] - result["found"], 0)
 
-        for node in comment_nodes:
-            comment_id = node.getAttribute("w:id") or node.getAttribute("id")
-            author = node.getAttribute("w:author") or node.getAttribute("author")
-            preview = _extract_first_text(node)
-            result["comment_list"].append({
-                "id": comment_id,
-                "author": author,
-                "preview": preview,
-            })
-
         return result
 
+    def iter_comment_info(self) -> Iterator[dict]:
+        """Yield id/author/preview for each comment in comments.xml without building a tree."""
+        if not self.comments_path.exists():
+            return
+        handler = _CommentInfoHandler()
+        parser = _make_sax_parser(handler)
+        with self.comments_path.open("rb") as fh:
+            for chunk in iter(lambda: fh.read(64 * 1024), b""):
+                parser.feed(chunk)
+                yield from handler.comments
+                handler.comments.clear()
+        parser.close()
+        yield from handler.comments
+
     def _ensure_comments_part(self) -> None:
         self._ensure_comments_xml()
         self._ensure_comments_relationship()
@@ -144,41 +248,41 @@ class Document:
             raise FileNotFoundError(f"Missing rels file: {self.rels_path}")
 
         rels_editor = self["word/_rels/document.xml.rels"]
-        root = rels_editor.dom.documentElement
+        root = rels_editor.dom.getroot()
 
-        for rel in _find_by_local_name(rels_editor.dom, "Relationship"):
-            if rel.getAttribute("Type") == COMMENTS_REL_TYPE:
+        for rel in rels_editor.dom.iter(RELATIONSHIP):
+            if rel.get("Type") == COMMENTS_REL_TYPE:
                 return
 
         next_id = _next_relationship_id(rels_editor.dom)
-        rel = rels_editor.dom.createElement("Relationship")
-        rel.setAttribute("Id", next_id)
-        rel.setAttribute("Type", COMMENTS_REL_TYPE)
-        rel.setAttribute("Target", "comments.xml")
-        root.appendChild(rel)
+        rel = etree.SubElement(root, RELATIONSHIP)
+        rel.set("Id", next_id)
+        rel.set("Type", COMMENTS_REL_TYPE)
+        rel.set("Target", "comments.xml")
 
     def _ensure_comments_content_type(self) -> None:
         if not self.content_types_path.exists():
             raise FileNotFoundError(f"Missing content types file: {self.content_types_path}")
 
         types_editor = self["[Content_Types].xml"]
-        root = types_editor.dom.documentElement
-        for override in _find_by_local_name(types_editor.dom, "Override"):
-            if override.getAttribute("PartName") == "/word/comments.xml":
+        root = types_editor.dom.getroot()
+        for override in types_editor.dom.iter(OVERRIDE):
+            if override.get("PartName") == "/word/comments.xml":
                 return
 
-        override = types_editor.dom.createElement("Override")
-        override.setAttribute("PartName", "/word/comments.xml")
-        override.setAttribute("ContentType", COMMENTS_CONTENT_TYPE)
-        root.appendChild(override)
+        override = etree.SubElement(root, OVERRIDE)
+        override.set("PartName", "/word/comments.xml")
+        override.set("ContentType", COMMENTS_CONTENT_TYPE)
 
     def _get_next_comment_id(self) -> int:
+        """Scan comments.xml once for the highest id; add_comments counts up from there."""
         if not self.comments_path.exists():
             return 0
+
         comments_editor = self["word/comments.xml"]
         max_id = -1
-        for node in _find_by_local_name(comments_editor.dom, "comment"):
-            raw = node.getAttribute("w:id") or node.getAttribute("id")
+        for node in comments_editor.dom.iter(W_COMMENT):
+            raw = node.get(W_ID) or node.get("id")
             if raw:
                 try:
                     max_id = max(max_id, int(raw))
@@ -187,84 +291,116 @@ class Document:
         return max_id + 1
 
     def _insert_comment_range(self, paragraph, comment_id: int) -> None:
-        doc = self["word/document.xml"].dom
-        start_elem = doc.createElement("w:commentRangeStart")
-        start_elem.setAttribute("w:id", str(comment_id))
-
-        first_elem = _first_element_child(paragraph)
-        if first_elem is not None:
-            paragraph.insertBefore(start_elem, first_elem)
-        else:
-            paragraph.appendChild(start_elem)
+        start_elem = etree.Element(W_COMMENT_RANGE_START)
+        start_elem.set(W_ID, str(comment_id))
+        paragraph.insert(0, start_elem)
 
     def _append_comment_reference(self, paragraph, comment_id: int) -> None:
-        doc = self["word/document.xml"].dom
-        end_elem = doc.createElement("w:commentRangeEnd")
-        end_elem.setAttribute("w:id", str(comment_id))
-        paragraph.appendChild(end_elem)
-
-        run = doc.createElement("w:r")
-        ref = doc.createElement("w:commentReference")
-        ref.setAttribute("w:id", str(comment_id))
-        run.appendChild(ref)
-        paragraph.appendChild(run)
-
-    def _append_comment_entry(self, comment_id: int, author: str, initials: str, timestamp: str, text: str) -> None:
-        comments_editor = self["word/comments.xml"]
-        root = comments_editor.dom.documentElement
-
-        comment = comments_editor.dom.createElement("w:comment")
-        comment.setAttribute("w:id", str(comment_id))
-        comment.setAttribute("w:author", author)
-        comment.setAttribute("w:initials", initials)
-        comment.setAttribute("w:date", timestamp)
-
-        lines = text.splitlines() or [""]
-        for line in lines:
-            para = comments_editor.dom.createElement("w:p")
-            run = comments_editor.dom.createElement("w:r")
-            text_elem = comments_editor.dom.createElement("w:t")
-            if _needs_space_preserve(line):
-                text_elem.setAttribute("xml:space", "preserve")
-            text_elem.appendChild(comments_editor.dom.createTextNode(html.escape(line)))
-            run.appendChild(text_elem)
-            para.appendChild(run)
-            comment.appendChild(para)
-
-        root.appendChild(comment)
+        end_elem = etree.SubElement(paragraph, W_COMMENT_RANGE_END)
+        end_elem.set(W_ID, str(comment_id))
 
-    def _get_reviewer_by_risk_level(self, risk_level: str) -> dict:
-        risk_reviewers = {
-            "高风险": {"author": "高风险", "initials": "高风险"},
-            "中风险": {"author": "中风险", "initials": "中风险"},
-            "低风险": {"author": "低风险", "initials": "低风险"},
-        }
-        english_reviewers = {
-            "high": {"author": "High Risk", "initials": "H"},
-            "medium": {"author": "Medium Risk", "initials": "M"},
-            "low": {"author": "Low Risk", "initials": "L"},
-        }
-
-        if not risk_level:
-            return risk_reviewers["中风险"]
-        if risk_level in risk_reviewers:
-            return risk_reviewers[risk_level]
+        run = etree.SubElement(paragraph, W_R)
+        ref = etree.SubElement(run, W_COMMENT_REFERENCE)
+        ref.set(W_ID, str(comment_id))
 
-        normalized = risk_level.strip().lower().replace("-", " ")
-        normalized = " ".join(normalized.split()).replace(" risk", "")
-        if normalized in english_reviewers:
-            return english_reviewers[normalized]
-        return risk_reviewers["中风险"]
+    def _get_reviewer_by_risk_level(self, risk_level: str) -> dict:
+        author, initials = _reviewer_for_risk_level(risk_level)
+        return {"author": author, "initials": initials}
 
     def _get_paragraph_node(self, node):
+        para = self._paragraph_ids.get(id(node))
+        if para is not None:
+            return para
         current = node
         while current is not None:
-            if getattr(current, "tagName", None) == "w:p":
+            if current.tag == W_P:
                 return current
-            current = current.parentNode
+            current = current.getparent()
         return None
 
 
+def _build_comment_entry(comment_id: int, author: str, initials: str, timestamp: str, text: str):
+    # One serialized fragment parsed by libxml2 instead of four SubElement calls per line.
+    lines = text.splitlines() or [""]
+    body = "".join(
+        f"<w:p><w:r><w:t{_SPACE_PRESERVE if _needs_space_preserve(line) else ''}>"
+        f"{_escape_text(line)}</w:t></w:r></w:p>"
+        for line in lines
+    )
+    xml = (
+        f'<w:comment xmlns:w="{WORDML_NS}" w:id="{comment_id}" w:author="{html.escape(author)}" '
+        f'w:initials="{html.escape(initials)}" w:date="{timestamp}">{body}</w:comment>'
+    )
+    return etree.fromstring(xml, _PARSER)
+
+
+@lru_cache(maxsize=32)
+def _reviewer_for_risk_level(risk_level: str) -> Tuple[str, str]:
+    # Cached as an immutable (author, initials) pair so callers cannot alter the shared tables.
+    reviewer = RISK_REVIEWERS["中风险"]
+    if risk_level in RISK_REVIEWERS:
+        reviewer = RISK_REVIEWERS[risk_level]
+    elif risk_level:
+        normalized = risk_level.strip().lower().replace("-", " ")
+        normalized = " ".join(normalized.split()).replace(" risk", "")
+        reviewer = ENGLISH_REVIEWERS.get(normalized, reviewer)
+    return reviewer["author"], reviewer["initials"]
+
+
+class _CommentInfoHandler(ContentHandler):
+    """Collects w:comment summaries and counts w:commentRangeStart markers."""
+
+    def __init__(self):
+        super().__init__()
+        self.comments: List[dict] = []
+        self.range_starts = 0
+        self._current: Optional[dict] = None
+        self._text: Optional[List[str]] = None
+
+    def startElementNS(self, name, qname, attrs):
+        if name == _SAX_COMMENT:
+            self._current = {
+                "id": attrs.get(_SAX_ID) or attrs.get((None, "id")),
+                "author": attrs.get(_SAX_AUTHOR) or attrs.get((None, "author")),
+                "preview": "",
+            }
+        elif name == _SAX_T and self._current is not None and not self._current["preview"]:
+            self._text = []
+        elif name == _SAX_COMMENT_RANGE_START:
+            self.range_starts += 1
+
+    def characters(self, content):
+        if self._text is not None:
+            self._text.append(content)
+
+    def endElementNS(self, name, qname):
+        if name == _SAX_T and self._text is not None:
+            self._current["preview"] = "".join(self._text)
+            self._text = None
+        elif name == _SAX_COMMENT and self._current is not None:
+            self.comments.append(self._current)
+            self._current = None
+
+
+def _make_sax_parser(handler: ContentHandler):
+    parser = defused_sax.make_parser()
+    parser.setFeature(feature_namespaces, True)
+    parser.setContentHandler(handler)
+    return parser
+
+
+def _stream_part(path: Path, handler: ContentHandler) -> ContentHandler:
+    _make_sax_parser(handler).parse(str(path))
+    return handler
+
+
+def _escape_text(text: str) -> str:
+    # Review comments rarely contain markup characters; skip the copy when none are present.
+    if "&" in text or "<" in text or ">" in text:
+        return html.escape(text, quote=False)
+    return text
+
+
 def _needs_space_preserve(text: str) -> bool:
     if text.startswith(" ") or text.endswith(" "):
         return True
@@ -273,34 +409,17 @@ def _needs_space_preserve(text: str) -> bool:
     return False
 
 
-def _first_element_child(node):
-    child = node.firstChild
-    while child is not None:
-        if child.nodeType == child.ELEMENT_NODE:
-            return child
-        child = child.nextSibling
-    return None
-
-
-def _find_by_local_name(dom, local: str) -> List:
-    matches = []
-    for node in dom.getElementsByTagName("*"):
-        if node.tagName.split(":")[-1] == local:
-            matches.append(node)
-    return matches
-
-
 def _extract_first_text(node) -> str:
-    for text_node in node.getElementsByTagName("w:t"):
-        if text_node.firstChild:
-            return text_node.firstChild.nodeValue
+    for text_node in node.iter(W_T):
+        if text_node.text:
+            return text_node.text
     return ""
 
 
 def _next_relationship_id(dom) -> str:
     max_id = 0
-    for rel in _find_by_local_name(dom, "Relationship"):
-        rid = rel.getAttribute("Id")
+    for rel in dom.iter(RELATIONSHIP):
+        rid = rel.get("Id")
         if rid.startswith("rId"):
             try:
                 max_id = max(max_id, int(rid[3:]))
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Document style setup shared by the summary and opinion renderers.
+"""
+
+from __future__ import annotations
+
+import io
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from docx import Document
+from docx.enum.text import WD_LINE_SPACING
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import Pt
+
+
+# Clark-notation names, resolved once instead of on every qn() call.
+_QN = {name: qn(name) for name in (
+    "w:ascii", "w:hAnsi", "w:eastAsia",
+    "w:top", "w:bottom", "w:left", "w:right",
+    "w:w", "w:type",
+)}
+
+
+@lru_cache(maxsize=8)
+def _prototype_docx(
+    font_name: str, base_font_size: int, line_spacing: float, style_names: Tuple[str, ...]
+) -> bytes:
+    """
+    Styled empty document, saved once per style combination; every render
+    loads a copy instead of re-applying the style setup to a fresh Document().
+    """
+    doc = Document()
+    _set_document_font(doc, font_name, base_font_size, line_spacing, style_names)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _set_document_font(
+    doc: Document, font_name: str, base_font_size: int, line_spacing: float, style_names: Tuple[str, ...]
+) -> None:
+    for style_name in style_names:
+        if style_name not in doc.styles:
+            continue
+        style = doc.styles[style_name]
+        style.font.name = font_name
+        style.font.size = Pt(base_font_size)
+        _set_style_east_asia_font(style, font_name)
+        style.paragraph_format.line_spacing_rule = WD_LINE_SPACING.MULTIPLE
+        style.paragraph_format.line_spacing = line_spacing
+
+
+def _set_style_east_asia_font(style, font_name: str) -> None:
+    rpr = style.element.get_or_add_rPr()
+    rfonts = rpr.rFonts
+    if rfonts is None:
+        rfonts = OxmlElement("w:rFonts")
+        rpr.append(rfonts)
+    rfonts.set(_QN["w:ascii"], font_name)
+    rfonts.set(_QN["w:hAnsi"], font_name)
+    rfonts.set(_QN["w:eastAsia"], font_name)
+
+
+def _set_run_font(run, font_name: str, size: Optional[int] = None, bold: Optional[bool] = None) -> None:
+    # Body runs take their font from the Normal style; only runs that override
+    # size or bold (titles, headings, table cells) get their own rPr.
+    run.font.name = font_name
+    if size is not None:
+        run.font.size = Pt(size)
+    if bold is not None:
+        run.bold = bold
+
+    rpr = run._element.get_or_add_rPr()
+    rfonts = rpr.rFonts
+    if rfonts is None:
+        rfonts = OxmlElement("w:rFonts")
+        rpr.append(rfonts)
+    rfonts.set(_QN["w:ascii"], font_name)
+    rfonts.set(_QN["w:hAnsi"], font_name)
+    rfonts.set(_QN["w:eastAsia"], font_name)
@@ -8,12 +8,35 @@ Error Handling and User Feedback Utilities
 """
 
 import sys
+import time
 import traceback
-from typing import List, Dict, Optional
+from typing import List, Dict
 from datetime import datetime
 from pathlib import Path
 
 
+# 报告与日志中的分隔线
+_EQ_LINE = "=" * 60
+_DASH_LINE = "-" * 60
+
+# 审核报告中单个问题的文本块(不含原文内容行)
+_ISSUE_BLOCK = (
+    "{idx}. 【问题类型】{type}\n"
+    "   【风险等级】{risk}\n"
+    "   【所在位置】{location}\n"
+    "   【风险原因】{reason}\n"
+    "   【修订建议】{suggestion}"
+)
+
+# 摘要与报告中固定不变的标题行
+_SUMMARY_HEADER = (_EQ_LINE, "批注添加摘要", _EQ_LINE)
+_SUMMARY_FAILED_HEADER = ("\n失败详情:", _DASH_LINE)
+_SUMMARY_WARNING_HEADER = ("\n警告:", _DASH_LINE)
+_REPORT_HEADER = (_EQ_LINE, "合同审核报告", _EQ_LINE, "", "一、基本信息", _DASH_LINE)
+_REPORT_ISSUES_HEADER = ("四、审核问题列表", _DASH_LINE, "")
+_REPORT_EVALUATION_HEADER = (_EQ_LINE, "总体评价", _EQ_LINE)
+
+
 # ==================== 自定义异常类 ====================
 
 class ReviewError(Exception):
@@ -46,6 +69,10 @@ class PackError(ReviewError):
     pass
 
 
+# 预期内的失败:调用方已按类型处理,日志中不保留调用栈
+_EXPECTED_ERRORS = (CommentNotFoundError,)
+
+
 # ==================== 版本检查 ====================
 
 def check_python_version(min_version: tuple = (3, 9),
@@ -122,6 +149,26 @@ def format_error_summary(errors: List[Dict]) -> str:
 
 # ==================== 批注批处理日志记录器 ====================
 
+class _LogEntry(dict):
+    """
+    日志条目
+
+    记录时只保存 time_ns(time.time_ns() 纳秒时间戳),
+    'timestamp'(datetime)在首次读取时才换算,记录路径上不构造 datetime。
+    """
+
+    def __missing__(self, key):
+        if key != 'timestamp':
+            raise KeyError(key)
+        value = self['timestamp'] = datetime.fromtimestamp(self['time_ns'] / 1e9)
+        return value
+
+    def get(self, key, default=None):
+        if key == 'timestamp' or key in self:
+            return self[key]
+        return default
+
+
 class CommentBatchLogger:
     """
     批注批处理日志记录器
@@ -130,10 +177,11 @@ class CommentBatchLogger:
     并生成详细的执行报告。
 
     Attributes:
-        successful: 成功添加的批注列表
-        failed: 失败的批注列表
-        warnings: 警告列表
+        successful: 成功添加的批注列表(dict: id, search, preview, time_ns, timestamp)
+        failed: 失败的批注列表(dict: search, error, error_type, traceback, time_ns, timestamp)
+        warnings: 警告列表(dict: message, details, time_ns, timestamp)
         start_time: 开始时间
+        start_time_ns: 开始时间(time.time_ns() 纳秒时间戳)
 
     Example:
         >>> logger = CommentBatchLogger()
@@ -146,10 +194,13 @@ class CommentBatchLogger:
 
     def __init__(self):
         """初始化日志记录器"""
-        self.successful = []
-        self.failed = []
-        self.warnings = []
-        self.start_time = datetime.now()
+        self.successful: List[Dict] = []
+        self.failed: List[Dict] = []
+        self.warnings: List[Dict] = []
+        self.start_time_ns = time.time_ns()
+        self.start_time = datetime.fromtimestamp(self.start_time_ns / 1e9)
+        # 耗时用单调时钟计算
+        self._start_monotonic_ns = time.monotonic_ns()
 
     def log_success(self, comment_id: int, search_text: str, preview: str = ""):
         """
@@ -160,28 +211,57 @@ class CommentBatchLogger:
             search_text: 搜索文本
             preview: 批注内容预览(可选)
         """
-        self.successful.append({
+        self.successful.append(_LogEntry({
             'id': comment_id,
             'search': search_text,
             'preview': preview,
-            'timestamp': datetime.now()
-        })
+            'time_ns': time.time_ns()
+        }))
 
-    def log_failure(self, search_text: str, error: Exception):
+    def log_failure(self, search_text: str, error: Exception, capture_traceback: bool = True):
         """
         记录失败的批注
 
+        调用栈在记录时即格式化为字符串,不持有异常对象(及其栈帧中的局部变量);
+        预期内的异常(如 CommentNotFoundError)不保留调用栈。
+
         Args:
             search_text: 搜索文本
             error: 异常对象
+            capture_traceback: 是否在日志文件中输出调用栈(默认输出)
+        """
+        message = str(error)
+        # 同类异常反复出现,共用同一个类型名字符串
+        error_type = sys.intern(type(error).__name__)
+        if capture_traceback and not isinstance(error, _EXPECTED_ERRORS):
+            formatted = ''.join(traceback.format_exception(type(error), error, error.__traceback__))
+        else:
+            formatted = f"{error_type}: {message}\n"
+        self.failed.append(_LogEntry({
+            'search': search_text,
+            'error': message,
+            'error_type': error_type,
+            'traceback': formatted,
+            'time_ns': time.time_ns()
+        }))
+
+    def log_failure_fast(self, search_text: str, error_type_name: str, message: str):
+        """
+        记录已由调用方归类的失败,不需要异常对象
+
+        Args:
+            search_text: 搜索文本
+            error_type_name: 错误类型名(如 "CommentNotFoundError")
+            message: 错误信息
         """
-        self.failed.append({
+        error_type = sys.intern(error_type_name)
+        self.failed.append(_LogEntry({
             'search': search_text,
-            'error': str(error),
-            'error_type': type(error).__name__,
-            'traceback': traceback.format_exc(),
-            'timestamp': datetime.now()
-        })
+            'error': message,
+            'error_type': error_type,
+            'traceback': f"{error_type}: {message}\n",
+            'time_ns': time.time_ns()
+        }))
 
     def log_warning(self, message: str, details: str = ""):
         """
@@ -191,11 +271,11 @@ class CommentBatchLogger:
             message: 警告消息
             details: 详细信息(可选)
         """
-        self.warnings.append({
+        self.warnings.append(_LogEntry({
             'message': message,
             'details': details,
-            'timestamp': datetime.now()
-        })
+            'time_ns': time.time_ns()
+        }))
 
     def generate_summary(self) -> str:
         """
@@ -204,34 +284,33 @@ class CommentBatchLogger:
         Returns:
             str: 格式化的摘要文本
         """
-        duration = (datetime.now() - self.start_time).total_seconds()
+        duration = (time.monotonic_ns() - self._start_monotonic_ns) / 1e9
 
-        lines = []
-        lines.append("=" * 60)
-        lines.append("批注添加摘要")
-        lines.append("=" * 60)
-        lines.append(f"\n执行时间: {duration:.2f} 秒")
-        lines.append(f"成功: {len(self.successful)} 个")
-        lines.append(f"失败: {len(self.failed)} 个")
-        lines.append(f"警告: {len(self.warnings)} 个")
+        lines = list(_SUMMARY_HEADER)
+        lines.extend((
+            f"\n执行时间: {duration:.2f} 秒",
+            f"成功: {len(self.successful)} 个",
+            f"失败: {len(self.failed)} 个",
+            f"警告: {len(self.warnings)} 个",
+        ))
 
         if self.failed:
-            lines.append("\n失败详情:")
-            lines.append("-" * 60)
+            lines.extend(_SUMMARY_FAILED_HEADER)
             for i, fail in enumerate(self.failed, 1):
-                lines.append(f"\n{i}. 搜索文本: {fail['search'][:50]}")
-                lines.append(f"   错误类型: {fail['error_type']}")
-                lines.append(f"   错误: {fail['error'][:100]}")
+                lines.extend((
+                    f"\n{i}. 搜索文本: {fail['search'][:50]}",
+                    f"   错误类型: {fail['error_type']}",
+                    f"   错误: {fail['error'][:100]}",
+                ))
 
         if self.warnings:
-            lines.append("\n警告:")
-            lines.append("-" * 60)
+            lines.extend(_SUMMARY_WARNING_HEADER)
             for i, warning in enumerate(self.warnings, 1):
                 lines.append(f"{i}. {warning['message']}")
                 if warning['details']:
                     lines.append(f"   详情: {warning['details'][:80]}")
 
-        lines.append("\n" + "=" * 60)
+        lines.append("\n" + _EQ_LINE)
         return '\n'.join(lines)
 
     def save_to_file(self, filepath: str):
@@ -241,32 +320,36 @@ class CommentBatchLogger:
         Args:
             filepath: 日志文件路径
         """
-        with open(filepath, 'w', encoding='utf-8') as f:
-            # 写入摘要
-            f.write(self.generate_summary())
-            f.write("\n\n详细错误追踪:\n")
-            f.write("=" * 60 + "\n\n")
+        # 先在内存中拼好全部内容,再一次性写入文件
+        parts = []
+
+        # 摘要
+        parts.append(self.generate_summary())
+        parts.append("\n\n详细错误追踪:\n")
+        parts.append(_EQ_LINE + "\n\n")
+
+        # 每个失败的详细信息
+        for i, fail in enumerate(self.failed, 1):
+            parts.append(f"错误 #{i}:\n")
+            parts.append(f"搜索文本: {fail['search']}\n")
+            parts.append(f"时间: {fail['timestamp']:%Y-%m-%d %H:%M:%S}\n")
+            parts.append(f"错误类型: {fail['error_type']}\n")
+            parts.append(f"错误信息:\n{fail['traceback']}\n")
+            parts.append("\n" + _DASH_LINE + "\n\n")
+
+        # 警告详情
+        if self.warnings:
+            parts.append("\n警告详情:\n")
+            parts.append(_EQ_LINE + "\n\n")
+            for i, warning in enumerate(self.warnings, 1):
+                parts.append(f"警告 #{i}:\n")
+                parts.append(f"时间: {warning['timestamp']:%Y-%m-%d %H:%M:%S}\n")
+                parts.append(f"消息: {warning['message']}\n")
+                if warning['details']:
+                    parts.append(f"详情: {warning['details']}\n")
+                parts.append("\n")
 
-            # 写入每个失败的详细信息
-            for i, fail in enumerate(self.failed, 1):
-                f.write(f"错误 #{i}:\n")
-                f.write(f"搜索文本: {fail['search']}\n")
-                f.write(f"时间: {fail['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"错误类型: {fail['error_type']}\n")
-                f.write(f"错误信息:\n{fail['traceback']}\n")
-                f.write("\n" + "-" * 60 + "\n\n")
-
-            # 写入警告详情
-            if self.warnings:
-                f.write("\n警告详情:\n")
-                f.write("=" * 60 + "\n\n")
-                for i, warning in enumerate(self.warnings, 1):
-                    f.write(f"警告 #{i}:\n")
-                    f.write(f"时间: {warning['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    f.write(f"消息: {warning['message']}\n")
-                    if warning['details']:
-                        f.write(f"详情: {warning['details']}\n")
-                    f.write("\n")
+        Path(filepath).write_text(''.join(parts), encoding='utf-8')
 
     def get_statistics(self) -> Dict:
         """
@@ -275,16 +358,17 @@ class CommentBatchLogger:
         Returns:
             dict: 包含 total, successful, failed, warnings 等统计
         """
-        total = len(self.successful) + len(self.failed)
-        success_rate = (len(self.successful) / total * 100) if total > 0 else 0
+        n_success = len(self.successful)
+        n_failed = len(self.failed)
+        total = n_success + n_failed
 
         return {
             'total': total,
-            'successful': len(self.successful),
-            'failed': len(self.failed),
+            'successful': n_success,
+            'failed': n_failed,
             'warnings': len(self.warnings),
-            'success_rate': success_rate,
-            'duration_seconds': (datetime.now() - self.start_time).total_seconds()
+            'success_rate': (n_success / total * 100) if total > 0 else 0,
+            'duration_seconds': (time.monotonic_ns() - self._start_monotonic_ns) / 1e9
         }
 
 
@@ -402,40 +486,37 @@ class ReviewReportGenerator:
         Returns:
             str: 完整的报告文本
         """
-        lines = []
-
-        # 标题
-        lines.append("=" * 60)
-        lines.append("合同审核报告")
-        lines.append("=" * 60)
-        lines.append("")
-
-        # 基本信息
-        lines.append("一、基本信息")
-        lines.append("-" * 60)
-        lines.append(f"合同文档: {self.basic_info.get('contract', 'N/A')}")
-        lines.append(f"审核人: {self.basic_info.get('reviewer', 'N/A')}")
-        lines.append(f"审核日期: {self.basic_info.get('date', 'N/A')}")
-        lines.append("")
+        # 标题与基本信息
+        lines = list(_REPORT_HEADER)
+        lines.extend((
+            f"合同文档: {self.basic_info.get('contract', 'N/A')}",
+            f"审核人: {self.basic_info.get('reviewer', 'N/A')}",
+            f"审核日期: {self.basic_info.get('date', 'N/A')}",
+            "",
+        ))
 
         # 统计数据
         if self.statistics:
-            lines.append("二、统计数据")
-            lines.append("-" * 60)
-            lines.append(f"总批注数: {self.statistics['total']}")
-            lines.append(f"成功添加: {self.statistics['successful']}")
-            lines.append(f"添加失败: {self.statistics['failed']}")
-            lines.append(f"成功率: {self.statistics['success_rate']:.1f}%")
-            lines.append("")
+            lines.extend((
+                "二、统计数据",
+                _DASH_LINE,
+                f"总批注数: {self.statistics['total']}",
+                f"成功添加: {self.statistics['successful']}",
+                f"添加失败: {self.statistics['failed']}",
+                f"成功率: {self.statistics['success_rate']:.1f}%",
+                "",
+            ))
 
         # 验证结果
         if self.verification:
-            lines.append("三、验证结果")
-            lines.append("-" * 60)
-            lines.append(f"批注总数: {self.verification['total']}")
-            lines.append(f"文档引用: {self.verification['found']}")
-            lines.append(f"缺失引用: {self.verification['missing']}")
-            lines.append("")
+            lines.extend((
+                "三、验证结果",
+                _DASH_LINE,
+                f"批注总数: {self.verification['total']}",
+                f"文档引用: {self.verification['found']}",
+                f"缺失引用: {self.verification['missing']}",
+                "",
+            ))
 
         # 问题列表(按风险等级分组)
         all_issues = []
@@ -447,24 +528,23 @@ class ReviewReportGenerator:
             all_issues.extend([(i, '🔵 低风险') for i in self.issues['low']])
 
         if all_issues:
-            lines.append("四、审核问题列表")
-            lines.append("-" * 60)
-            lines.append("")
+            lines.extend(_REPORT_ISSUES_HEADER)
 
             for idx, (issue, risk_label) in enumerate(all_issues, 1):
-                lines.append(f"{idx}. 【问题类型】{issue['type']}")
-                lines.append(f"   【风险等级】{risk_label}")
-                lines.append(f"   【所在位置】{issue['location']}")
-                lines.append(f"   【风险原因】{issue['reason']}")
-                lines.append(f"   【修订建议】{issue['suggestion']}")
+                lines.append(_ISSUE_BLOCK.format_map({
+                    'idx': idx,
+                    'type': issue['type'],
+                    'risk': risk_label,
+                    'location': issue['location'],
+                    'reason': issue['reason'],
+                    'suggestion': issue['suggestion'],
+                }))
                 if issue.get('original_text'):
                     lines.append(f"   【原文内容】{issue['original_text'][:80]}...")
                 lines.append("")
 
         # 总体评价
-        lines.append("=" * 60)
-        lines.append("总体评价")
-        lines.append("=" * 60)
+        lines.extend(_REPORT_EVALUATION_HEADER)
         high_count = len(self.issues['high'])
         medium_count = len(self.issues['medium'])
         low_count = len(self.issues['low'])
@@ -480,7 +560,7 @@ class ReviewReportGenerator:
             lines.append("\n✓ 合同质量良好,仅发现少量低风险问题。")
 
         lines.append("")
-        lines.append("=" * 60)
+        lines.append(_EQ_LINE)
 
         return '\n'.join(lines)
 
@@ -491,9 +571,7 @@ class ReviewReportGenerator:
         Args:
             filepath: 报告文件路径
         """
-        report_text = self.generate()
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(report_text)
+        Path(filepath).write_text(self.generate(), encoding='utf-8')
 
 
 # ==================== 使用示例 ====================
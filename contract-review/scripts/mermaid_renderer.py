@@ -10,10 +10,34 @@ import shutil
 import subprocess
 import json
 import os
+import platform
+import sys
 import tempfile
 import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import List, Optional, Sequence, Tuple
+
+_CJK_RE = re.compile("[\u4e00-\u9fff]")
+_PERCENT_RE = re.compile("[%％]")
+_DIGIT_COMMA_RE = re.compile(r"(?<=\d),(?=\d)")
+# Horizontal runs only: collapsing newlines would merge Mermaid statements.
+_MULTISPACE_RE = re.compile(r"[ \t]{2,}")
+_PARENS_TO_SPACES = str.maketrans({"(": " ", ")": " "})
+# mmdc reports Mermaid syntax problems this way; only these are worth sanitizing for.
+_SYNTAX_ERROR_RE = re.compile(rb"Parse error|Lexical error")
+
+# Launch args shared by every generated Puppeteer config; each config adds its
+# own --user-data-dir, since Chrome locks that dir while it runs.
+_PUPPETEER_ARGS = (
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-crashpad",
+    "--no-first-run",
+    "--no-default-browser-check",
+)
 
 
 def normalize_mermaid_code(code: str) -> str:
@@ -55,52 +79,50 @@ def render_mermaid_file(
     """
     Render a Mermaid .mmd file to an image using mermaid-cli (mmdc).
     """
-    mmdc_path = mmdc_path or shutil.which("mmdc")
+    mmdc_path = mmdc_path or _cached_mmdc()
     if not mmdc_path:
         raise FileNotFoundError(
             "mmdc not found in PATH. Install @mermaid-js/mermaid-cli to render Mermaid."
         )
 
     def build_cmd(input_path: Path, config_path: Optional[Path]) -> list[str]:
-        cmd = [mmdc_path, "-i", str(input_path), "-o", str(image_path)]
-        if theme:
-            cmd += ["-t", theme]
-        if background_color:
-            cmd += ["-b", background_color]
-        if scale and scale != 1:
-            cmd += ["-s", str(scale)]
-        if width:
-            cmd += ["-w", str(width)]
-        if height:
-            cmd += ["-H", str(height)]
-        if config_path:
-            cmd += ["-p", str(config_path)]
-        return cmd
+        return _build_mmdc_cmd(
+            mmdc_path, input_path, image_path, theme, background_color,
+            scale, width, height, config_path,
+        )
 
     config_path = Path(puppeteer_config_path) if puppeteer_config_path else None
-    created_config = False
-    temp_user_data_dir: Optional[Path] = None
+    created_config: Optional[Tuple[Path, Path]] = None
     last_error: Optional[subprocess.CalledProcessError] = None
 
     try:
+        if config_path is None and _needs_puppeteer_config():
+            chrome_path = _puppeteer_chrome_path()
+            if chrome_path:
+                created_config = _write_puppeteer_config(chrome_path)
+                config_path = created_config[0]
+
         try:
-            subprocess.run(build_cmd(mmd_path, config_path), check=True)
+            _run_mmdc(build_cmd(mmd_path, config_path))
             return
         except subprocess.CalledProcessError as exc:
             last_error = exc
 
-        if config_path is None:
-            chrome_path = os.environ.get("PUPPETEER_EXECUTABLE_PATH") or _find_chrome_executable()
+        if config_path is None and not _is_syntax_error(last_error):
+            chrome_path = _puppeteer_chrome_path()
             if not chrome_path:
                 raise last_error
-            config_path, temp_user_data_dir = _write_puppeteer_config(chrome_path)
-            created_config = True
+            created_config = _write_puppeteer_config(chrome_path)
+            config_path = created_config[0]
 
-        try:
-            subprocess.run(build_cmd(mmd_path, config_path), check=True)
-            return
-        except subprocess.CalledProcessError as exc:
-            last_error = exc
+            try:
+                _run_mmdc(build_cmd(mmd_path, config_path))
+                return
+            except subprocess.CalledProcessError as exc:
+                last_error = exc
+
+        if not _is_syntax_error(last_error):
+            raise last_error
 
         try:
             original = mmd_path.read_text(encoding="utf-8")
@@ -113,7 +135,7 @@ def render_mermaid_file(
 
         sanitized_path = _write_temp_mmd(sanitized, mmd_path)
         try:
-            subprocess.run(build_cmd(sanitized_path, config_path), check=True)
+            _run_mmdc(build_cmd(sanitized_path, config_path))
             return
         except subprocess.CalledProcessError as exc:
             last_error = exc
@@ -123,14 +145,14 @@ def render_mermaid_file(
                 sanitized_path.unlink(missing_ok=True)
             except Exception:
                 pass
+    except subprocess.CalledProcessError as exc:
+        # Output is captured to classify failures; surface it for the final one.
+        if exc.stderr:
+            sys.stderr.write(exc.stderr.decode("utf-8", errors="replace"))
+        raise
     finally:
         if created_config:
-            try:
-                config_path.unlink(missing_ok=True)
-            except Exception:
-                pass
-            if temp_user_data_dir:
-                shutil.rmtree(temp_user_data_dir, ignore_errors=True)
+            _remove_puppeteer_config(*created_config)
 
 
 def render_mermaid_code(
@@ -164,6 +186,170 @@ def render_mermaid_code(
     return mmd_path, image_path
 
 
+def render_mermaid_batch(
+    items: Sequence[Tuple[Path, Path]],
+    theme: str = "default",
+    background_color: str = "white",
+    mmdc_path: Optional[str] = None,
+    scale: float = 2,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    puppeteer_config_path: Optional[str] = None,
+    max_workers: Optional[int] = None,
+) -> None:
+    """
+    Render several (.mmd, image) pairs with a single mmdc/Chrome launch.
+
+    The diagrams are combined into one Markdown file, which mmdc renders in one
+    browser session. Falls back to render_mermaid_file per diagram if the batch
+    run fails or the image formats differ; those renders run concurrently on up
+    to max_workers threads (default: CPU count), one mmdc process each.
+    """
+    items = [(Path(mmd), Path(image)) for mmd, image in items]
+    options = dict(
+        theme=theme,
+        background_color=background_color,
+        mmdc_path=mmdc_path,
+        scale=scale,
+        width=width,
+        height=height,
+        puppeteer_config_path=puppeteer_config_path,
+    )
+    formats = {image.suffix.lower().lstrip(".") for _, image in items}
+    if len(items) > 1 and len(formats) == 1:
+        try:
+            if _render_markdown_batch(items, formats.pop(), **options):
+                return
+        except (OSError, subprocess.CalledProcessError):
+            pass
+
+    workers = min(len(items), max_workers or os.cpu_count() or 1)
+    if workers <= 1:
+        for mmd_path, image_path in items:
+            render_mermaid_file(mmd_path, image_path, **options)
+        return
+    _render_concurrently(items, workers, options)
+
+
+def _render_concurrently(items: List[Tuple[Path, Path]], workers: int, options: dict) -> None:
+    # Every render_mermaid_file call writes its own Puppeteer config and
+    # user-data dir, so concurrent Chrome launches never share a locked profile.
+    def render(item: Tuple[Path, Path]) -> None:
+        render_mermaid_file(item[0], item[1], **options)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for _ in pool.map(render, items):
+            pass
+
+
+def _render_markdown_batch(
+    items: List[Tuple[Path, Path]],
+    image_format: str,
+    theme: str,
+    background_color: str,
+    mmdc_path: Optional[str],
+    scale: float,
+    width: Optional[int],
+    height: Optional[int],
+    puppeteer_config_path: Optional[str],
+) -> bool:
+    mmdc_path = mmdc_path or _cached_mmdc()
+    if not mmdc_path:
+        raise FileNotFoundError(
+            "mmdc not found in PATH. Install @mermaid-js/mermaid-cli to render Mermaid."
+        )
+
+    with tempfile.TemporaryDirectory(prefix="mermaid-batch-") as work_dir:
+        work = Path(work_dir)
+        source = work / "diagrams.md"
+        blocks = [
+            f"```mermaid\n{normalize_mermaid_code(mmd.read_text(encoding='utf-8'))}```\n"
+            for mmd, _ in items
+        ]
+        source.write_text("\n".join(blocks), encoding="utf-8")
+
+        config_path = Path(puppeteer_config_path) if puppeteer_config_path else None
+        created_config: Optional[Tuple[Path, Path]] = None
+        if config_path is None and _needs_puppeteer_config():
+            chrome_path = _puppeteer_chrome_path()
+            if chrome_path:
+                created_config = _write_puppeteer_config(chrome_path)
+                config_path = created_config[0]
+        cmd = _build_mmdc_cmd(
+            mmdc_path, source, work / "rendered.md", theme, background_color,
+            scale, width, height, config_path,
+        )
+        try:
+            subprocess.run(cmd + ["-e", image_format], check=True)
+        finally:
+            if created_config:
+                _remove_puppeteer_config(*created_config)
+
+        # mmdc names Markdown outputs <output stem>-<n>.<format>, numbered from 1.
+        rendered = [work / f"rendered-{index}.{image_format}" for index in range(1, len(items) + 1)]
+        if not all(path.exists() for path in rendered):
+            return False
+        for path, (_, image_path) in zip(rendered, items):
+            image_path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(path), str(image_path))
+    return True
+
+
+@lru_cache(maxsize=1)
+def _cached_mmdc() -> Optional[str]:
+    return shutil.which("mmdc")
+
+
+def _build_mmdc_cmd(
+    mmdc_path: str,
+    input_path: Path,
+    output_path: Path,
+    theme: str,
+    background_color: str,
+    scale: float,
+    width: Optional[int],
+    height: Optional[int],
+    config_path: Optional[Path],
+) -> list[str]:
+    cmd = [mmdc_path, "-i", str(input_path), "-o", str(output_path)]
+    if theme:
+        cmd += ["-t", theme]
+    if background_color:
+        cmd += ["-b", background_color]
+    if scale and scale != 1:
+        cmd += ["-s", str(scale)]
+    if width:
+        cmd += ["-w", str(width)]
+    if height:
+        cmd += ["-H", str(height)]
+    if config_path:
+        cmd += ["-p", str(config_path)]
+    return cmd
+
+
+def _run_mmdc(cmd: List[str]) -> None:
+    # Bytes mode: the output is only searched for syntax errors, so it is not
+    # decoded with the locale codec (which may not be UTF-8) on every run.
+    subprocess.run(cmd, check=True, capture_output=True)
+
+
+def _is_syntax_error(error: subprocess.CalledProcessError) -> bool:
+    return bool(error.stderr) and _SYNTAX_ERROR_RE.search(error.stderr) is not None
+
+
+def _needs_puppeteer_config() -> bool:
+    # Chrome refuses to start as root without --no-sandbox, and an explicit executable
+    # needs the config too, so in these cases a bare first mmdc attempt is doomed.
+    # Checked on every render, so later changes to the environment are picked up.
+    if os.environ.get("PUPPETEER_EXECUTABLE_PATH"):
+        return True
+    return platform.system() == "Linux" and hasattr(os, "geteuid") and os.geteuid() == 0
+
+
+def _puppeteer_chrome_path() -> Optional[str]:
+    return os.environ.get("PUPPETEER_EXECUTABLE_PATH") or _find_chrome_executable()
+
+
 def _find_chrome_executable() -> Optional[str]:
     """
     Best-effort Chrome/Chromium detection for Puppeteer fallback.
@@ -181,19 +367,14 @@ def _find_chrome_executable() -> Optional[str]:
 def _write_puppeteer_config(executable_path: str) -> tuple[Path, Path]:
     """
     Write a temporary Puppeteer config with safer sandbox args.
+
+    Each call gets a fresh Chrome user-data dir; remove both with
+    _remove_puppeteer_config once the render is done.
     """
     user_data_dir = Path(tempfile.mkdtemp(prefix="puppeteer-user-data-"))
     payload = {
         "executablePath": executable_path,
-        "args": [
-            "--no-sandbox",
-            "--disable-setuid-sandbox",
-            "--disable-dev-shm-usage",
-            "--disable-crashpad",
-            "--no-first-run",
-            "--no-default-browser-check",
-            f"--user-data-dir={user_data_dir}",
-        ],
+        "args": [*_PUPPETEER_ARGS, f"--user-data-dir={user_data_dir}"],
     }
     handle, path = tempfile.mkstemp(prefix="puppeteer-", suffix=".json")
     os.close(handle)
@@ -202,22 +383,27 @@ def _write_puppeteer_config(executable_path: str) -> tuple[Path, Path]:
     return config_path, user_data_dir
 
 
+def _remove_puppeteer_config(config_path: Path, user_data_dir: Path) -> None:
+    try:
+        config_path.unlink(missing_ok=True)
+    except OSError:
+        pass
+    shutil.rmtree(user_data_dir, ignore_errors=True)
+
+
 def _sanitize_mermaid_code_for_render(code: str) -> str:
-    if "%" not in code and "％" not in code:
+    if _PERCENT_RE.search(code) is None:
         return code
     replacement = "百分比" if _contains_cjk(code) else "percent"
     sanitized = code.replace("％", replacement).replace("%", replacement)
-    sanitized = re.sub(r"(?<=\\d),(?=\\d)", "", sanitized)
-    sanitized = sanitized.replace("(", " ").replace(")", " ")
-    sanitized = re.sub(r"\\s{2,}", " ", sanitized)
+    sanitized = _DIGIT_COMMA_RE.sub("", sanitized)
+    sanitized = sanitized.translate(_PARENS_TO_SPACES)
+    sanitized = _MULTISPACE_RE.sub(" ", sanitized)
     return sanitized
 
 
 def _contains_cjk(text: str) -> bool:
-    for char in text:
-        if "\u4e00" <= char <= "\u9fff":
-            return True
-    return False
+    return _CJK_RE.search(text) is not None
 
 
 def _write_temp_mmd(code: str, source_path: Path) -> Path:
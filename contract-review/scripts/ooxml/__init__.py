@@ -1,6 +1,6 @@
 """OOXML helpers for packing, unpacking, and lightweight validation."""
 
 from .pack import pack_document
-from .unpack import unpack_document
+from .unpack import unpack_document, unpack_document_to_dict
 
-__all__ = ["pack_document", "unpack_document"]
+__all__ = ["pack_document", "unpack_document", "unpack_document_to_dict"]
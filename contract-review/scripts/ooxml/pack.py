@@ -4,9 +4,12 @@ Pack an unpacked Office directory into a .docx, .pptx, or .xlsx file.
 """
 
 import argparse
+import os
 import sys
 import zipfile
+import zlib
 from pathlib import Path
+from typing import Iterator, Tuple
 
 import defusedxml.ElementTree as ET
 
@@ -17,8 +20,25 @@ DOC_REQUIRED = {
     ".xlsx": ["[Content_Types].xml", "xl/workbook.xml"],
 }
 
-
-def pack_document(input_dir: str, output_file: str, validate: bool = False) -> bool:
+# Parts that are usually already compressed. They are stored rather than
+# deflated only if a sample confirms it (see _is_incompressible); some, such as
+# flat thumbnails, still shrink a lot.
+STORED_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".docx", ".xlsx", ".pptx", ".zip"}
+# Bytes sampled from the start of a part, and the deflated/raw ratio at or
+# above which storing it is not worse than deflating.
+COMPRESSIBILITY_SAMPLE = 64 * 1024
+STORE_RATIO = 0.9
+DEFLATE_LEVEL = 6
+# zipfile emits many small header and compressed-chunk writes; batch them into large syscalls.
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Parts written first, in this order; readers look for them before anything else.
+LEADING_PARTS = ("[Content_Types].xml", "_rels/.rels")
+
+
+def pack_document(
+    input_dir: str, output_file: str, validate: bool = False, compresslevel: int = DEFLATE_LEVEL
+) -> bool:
     """
     Pack a directory into an Office file (.docx/.pptx/.xlsx).
 
@@ -26,6 +46,7 @@ def pack_document(input_dir: str, output_file: str, validate: bool = False) -> b
         input_dir: Path to unpacked Office document directory
         output_file: Path to output Office file
         validate: If True, run lightweight structural checks
+        compresslevel: Deflate level for compressible parts (1 = fastest, 9 = smallest)
 
     Returns:
         bool: True if successful, False if validation failed
@@ -40,10 +61,21 @@ def pack_document(input_dir: str, output_file: str, validate: bool = False) -> b
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as archive:
-        for item in sorted(input_path.rglob("*")):
-            if item.is_file():
-                archive.write(item, item.relative_to(input_path))
+    leading = {name: index for index, name in enumerate(LEADING_PARTS)}
+    files = sorted(
+        _walk(input_path),
+        key=lambda entry: (leading.get(entry[1], len(leading)), entry[1]),
+    )
+
+    with open(output_path, "wb", buffering=WRITE_BUFFER_SIZE) as handle, \
+            zipfile.ZipFile(handle, "w") as archive:
+        for item, arcname in files:
+            if os.path.splitext(arcname)[1].lower() in STORED_SUFFIXES and _is_incompressible(item):
+                archive.write(item, arcname, compress_type=zipfile.ZIP_STORED)
+            else:
+                archive.write(
+                    item, arcname, compress_type=zipfile.ZIP_DEFLATED, compresslevel=compresslevel
+                )
 
     if validate:
         if not validate_document(output_path):
@@ -53,6 +85,26 @@ def pack_document(input_dir: str, output_file: str, validate: bool = False) -> b
     return True
 
 
+def _is_incompressible(path: str) -> bool:
+    """Deflate a sample of the file at the fastest level and compare sizes."""
+    with open(path, "rb") as handle:
+        sample = handle.read(COMPRESSIBILITY_SAMPLE)
+    if not sample:
+        return False
+    return len(zlib.compress(sample, 1)) >= len(sample) * STORE_RATIO
+
+
+def _walk(root: Path, prefix: str = "") -> Iterator[Tuple[str, str]]:
+    """Yield (file path, archive name) for every file under root using os.scandir."""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            arcname = f"{prefix}{entry.name}"
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk(entry.path, f"{arcname}/")
+            elif entry.is_file():
+                yield entry.path, arcname
+
+
 def validate_document(doc_path: Path) -> bool:
     """Lightweight validation: required files exist and XML parses."""
     suffix = doc_path.suffix.lower()
@@ -70,7 +122,9 @@ def validate_document(doc_path: Path) -> bool:
                 if name.endswith((".xml", ".rels")):
                     with archive.open(name) as handle:
                         try:
-                            ET.parse(handle)
+                            # Well-formedness only: stream the part and drop each element.
+                            for _event, elem in ET.iterparse(handle, events=("end",)):
+                                elem.clear()
                         except ET.ParseError as exc:
                             print(f"Validation error: invalid XML in {name}: {exc}", file=sys.stderr)
                             return False
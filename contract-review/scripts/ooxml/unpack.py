@@ -1,36 +1,88 @@
 #!/usr/bin/env python3
 """Unpack Office files (.docx, .pptx, .xlsx) into a directory."""
 
-import random
+import os
+import secrets
 import sys
 import zipfile
 from pathlib import Path
+from typing import Dict, Optional
 
 
-def unpack_document(input_file: str, output_dir: str) -> None:
+def unpack_document_to_dict(input_file: str) -> Dict[str, bytes]:
+    """
+    Read every part of an Office file into memory.
+
+    Args:
+        input_file: Path to the Office file (.docx, .pptx, .xlsx)
+
+    Returns:
+        Dict mapping archive names (e.g. "word/document.xml") to part bytes.
+        Directory entries are omitted.
+    """
+    input_path = Path(input_file)
+    if not input_path.is_file():
+        raise FileNotFoundError(f"Input file not found: {input_file}")
+
+    with zipfile.ZipFile(input_path, "r") as archive:
+        return {
+            info.filename: archive.read(info)
+            for info in archive.infolist()
+            if not info.is_dir()
+        }
+
+
+def unpack_document(input_file: str, output_dir: str, parts: Optional[Dict[str, bytes]] = None) -> None:
     """
     Unpack an Office file into a directory.
 
     Args:
         input_file: Path to the Office file (.docx, .pptx, .xlsx)
         output_dir: Directory to extract contents to
+        parts: Parts of input_file already read by unpack_document_to_dict;
+            when given, the archive is not opened again
     """
     input_path = Path(input_file)
     output_path = Path(output_dir)
 
-    if not input_path.is_file():
+    if parts is None and not input_path.is_file():
         raise FileNotFoundError(f"Input file not found: {input_file}")
 
     output_path.mkdir(parents=True, exist_ok=True)
 
-    with zipfile.ZipFile(input_path, "r") as archive:
-        archive.extractall(output_path)
+    if parts is None:
+        # Stream each member to disk; extractall sanitizes member names.
+        with zipfile.ZipFile(input_path, "r") as archive:
+            archive.extractall(output_path)
+    else:
+        created = {output_path}
+        for name, data in parts.items():
+            target = output_path.joinpath(*_safe_parts(name))
+            if target.parent not in created:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                created.add(target.parent)
+            target.write_bytes(data)
 
     if input_path.suffix.lower() == ".docx":
-        suggested_rsid = "".join(random.choices("0123456789ABCDEF", k=8))
+        suggested_rsid = secrets.token_hex(4).upper()
         print(f"Suggested RSID for edit session: {suggested_rsid}")
 
 
+def _safe_parts(name: str):
+    """
+    Split an archive name into path components the way ZipFile.extractall
+    does: drop any drive and the empty, "." and ".." components.
+    """
+    arcname = name.replace("/", os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    parts = [part for part in arcname.split(os.path.sep) if part not in ("", os.path.curdir, os.path.pardir)]
+    if not parts:
+        raise ValueError(f"Invalid archive member name: {name}")
+    return parts
+
+
 if __name__ == "__main__":
     if len(sys.argv) != 3:
         raise SystemExit("Usage: python unpack.py <office_file> <output_dir>")
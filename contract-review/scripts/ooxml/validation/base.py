@@ -2,11 +2,17 @@
 
 from __future__ import annotations
 
+import os
+import posixpath
 from pathlib import Path
-from typing import Iterable
+from typing import Dict, Iterable, Set
 
 import defusedxml.ElementTree as ET
 
+# Parts up to this size are read once and parsed in a single call; larger ones
+# are streamed through iterparse.
+_SMALL_PART_BYTES = 64 * 1024
+
 
 class BaseValidator:
     """Basic structural checks for unpacked Office documents."""
@@ -17,6 +23,8 @@ class BaseValidator:
         self.unpacked_dir = Path(unpacked_dir)
         self.original_file = Path(original_file)
         self.verbose = verbose
+        # Directory listings (relative dir -> entry names), read once per directory.
+        self._listings: Dict[str, Set[str]] = {}
 
     def validate(self) -> bool:
         if not self._check_required_files(self.required_files):
@@ -24,20 +32,37 @@ class BaseValidator:
         return self._parse_xml_files(self.required_files)
 
     def _check_required_files(self, rel_paths: Iterable[str]) -> bool:
-        missing = [p for p in rel_paths if not (self.unpacked_dir / p).exists()]
+        missing = [p for p in rel_paths if not self._exists(p)]
         if missing:
             if self.verbose:
                 print(f"Missing required files: {missing}")
             return False
         return True
 
+    def _exists(self, rel_path: str) -> bool:
+        directory, name = posixpath.split(rel_path)
+        listing = self._listings.get(directory)
+        if listing is None:
+            try:
+                with os.scandir(self.unpacked_dir / directory) as entries:
+                    listing = {entry.name for entry in entries}
+            except OSError:
+                listing = set()
+            self._listings[directory] = listing
+        return name in listing
+
     def _parse_xml_files(self, rel_paths: Iterable[str]) -> bool:
         for rel_path in rel_paths:
             if not rel_path.endswith((".xml", ".rels")):
                 continue
             file_path = self.unpacked_dir / rel_path
             try:
-                ET.parse(file_path)
+                if file_path.stat().st_size <= _SMALL_PART_BYTES:
+                    ET.fromstring(file_path.read_bytes())
+                else:
+                    # Well-formedness only: stream the part and drop each element.
+                    for _event, elem in ET.iterparse(str(file_path), events=("end",)):
+                        elem.clear()
             except ET.ParseError as exc:
                 if self.verbose:
                     print(f"Invalid XML in {rel_path}: {exc}")
@@ -6,19 +6,25 @@ Render comprehensive review opinion text to a styled DOCX document.
 
 from __future__ import annotations
 
+import copy
+import io
 import re
 from pathlib import Path
 from typing import List
 
 from docx import Document
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT, WD_LINE_SPACING
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
 from docx.shared import Pt
 
+from .docx_styles import _prototype_docx, _set_run_font
+
 
 DEFAULT_LINE_SPACING = 1.3
-NUMBERED_ITEM_PATTERN = re.compile(r"(?:^|[\s：:；;])(\d+[\.、](?!\d))")
+# Blank lines (possibly holding whitespace or CRs) separate paragraphs.
+_PARA_SPLIT_RE = re.compile(r"\n\s*\n")
+# The separator is a lookbehind so re.split keeps it with the preceding text;
+# group 1 captures the marker, e.g. "1." or "2、".
+NUMBERED_ITEM_PATTERN = re.compile(r"(?:^|(?<=[\s：:；;]))(\d+[\.、](?!\d))")
 
 
 def render_opinion_docx(
@@ -36,16 +42,17 @@ def render_opinion_docx(
     output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    doc = Document()
-    _set_document_font(doc, font_name, base_font_size, line_spacing)
+    doc = Document(io.BytesIO(_prototype_docx(font_name, base_font_size, line_spacing, ("Normal", "Heading 1"))))
 
     if add_title:
         _add_title(doc, title_text, font_name)
 
-    paragraphs = _split_paragraphs(opinion_text)
-    for para_text in paragraphs:
-        for segment in _split_numbered_items(para_text):
-            _add_paragraph(doc, segment, font_name, line_spacing)
+    segments = [
+        segment
+        for para_text in _split_paragraphs(opinion_text)
+        for segment in _split_numbered_items(para_text)
+    ]
+    _add_paragraphs(doc, segments, line_spacing)
 
     doc.save(output_path)
     return output_path
@@ -55,7 +62,7 @@ def _split_paragraphs(text: str) -> List[str]:
     raw = text.strip()
     if not raw:
         return []
-    parts = [p.strip() for p in raw.split("\n\n") if p.strip()]
+    parts = [part for part in map(str.strip, _PARA_SPLIT_RE.split(raw)) if part]
     if parts:
         return parts
     return [line.strip() for line in raw.splitlines() if line.strip()]
@@ -65,64 +72,21 @@ def _split_numbered_items(text: str) -> List[str]:
     cleaned = text.strip()
     if not cleaned:
         return []
-    matches = list(NUMBERED_ITEM_PATTERN.finditer(cleaned))
-    if not matches:
+    tokens = NUMBERED_ITEM_PATTERN.split(cleaned)
+    if len(tokens) == 1:
         return [cleaned]
 
-    starts = [match.start(1) for match in matches]
     parts: List[str] = []
-    lead = cleaned[:starts[0]].strip()
+    lead = tokens[0].strip()
     if lead:
         parts.append(lead)
-    for index, start in enumerate(starts):
-        end = starts[index + 1] if index + 1 < len(starts) else len(cleaned)
-        item = cleaned[start:end].strip()
-        item = item.rstrip("；; ")
+    for marker, rest in zip(tokens[1::2], tokens[2::2]):
+        item = (marker + rest).strip().rstrip("；; ")
         if item:
             parts.append(item)
     return parts
 
 
-def _set_document_font(doc: Document, font_name: str, base_font_size: int, line_spacing: float) -> None:
-    for style_name in ("Normal", "Heading 1"):
-        if style_name not in doc.styles:
-            continue
-        style = doc.styles[style_name]
-        style.font.name = font_name
-        style.font.size = Pt(base_font_size)
-        _set_style_east_asia_font(style, font_name)
-        style.paragraph_format.line_spacing_rule = WD_LINE_SPACING.MULTIPLE
-        style.paragraph_format.line_spacing = line_spacing
-
-
-def _set_style_east_asia_font(style, font_name: str) -> None:
-    rpr = style.element.get_or_add_rPr()
-    rfonts = rpr.rFonts
-    if rfonts is None:
-        rfonts = OxmlElement("w:rFonts")
-        rpr.append(rfonts)
-    rfonts.set(qn("w:ascii"), font_name)
-    rfonts.set(qn("w:hAnsi"), font_name)
-    rfonts.set(qn("w:eastAsia"), font_name)
-
-
-def _set_run_font(run, font_name: str, size: int | None = None, bold: bool | None = None) -> None:
-    run.font.name = font_name
-    if size is not None:
-        run.font.size = Pt(size)
-    if bold is not None:
-        run.bold = bold
-
-    rpr = run._element.get_or_add_rPr()
-    rfonts = rpr.rFonts
-    if rfonts is None:
-        rfonts = OxmlElement("w:rFonts")
-        rpr.append(rfonts)
-    rfonts.set(qn("w:ascii"), font_name)
-    rfonts.set(qn("w:hAnsi"), font_name)
-    rfonts.set(qn("w:eastAsia"), font_name)
-
-
 def _add_title(doc: Document, text: str, font_name: str) -> None:
     para = doc.add_paragraph()
     run = para.add_run(text)
@@ -131,10 +95,32 @@ def _add_title(doc: Document, text: str, font_name: str) -> None:
     para.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
 
 
-def _add_paragraph(doc: Document, text: str, font_name: str, line_spacing: float) -> None:
+def _add_paragraph(doc: Document, text: str, line_spacing: float) -> None:
     para = doc.add_paragraph()
-    run = para.add_run(text)
-    _set_run_font(run, font_name)
+    para.add_run(text)
     para.paragraph_format.space_after = Pt(4)
     para.paragraph_format.line_spacing_rule = WD_LINE_SPACING.MULTIPLE
     para.paragraph_format.line_spacing = line_spacing
+
+
+def _add_paragraphs(doc: Document, texts: List[str], line_spacing: float) -> None:
+    """
+    Add body paragraphs by cloning one styled template instead of building each
+    through python-docx, then insert them into the body in a single step.
+    """
+    if not texts:
+        return
+    _add_paragraph(doc, "", line_spacing)
+    body = doc.element.body
+    template = doc.paragraphs[-1]._p
+    body.remove(template)
+
+    elements = []
+    for text in texts:
+        p = copy.deepcopy(template)
+        p.r_lst[-1].text = text
+        elements.append(p)
+
+    sect_pr = body.sectPr
+    index = body.index(sect_pr) if sect_pr is not None else len(body)
+    body[index:index] = elements
@@ -6,25 +6,49 @@ Render contract summary text to a styled DOCX document.
 
 from __future__ import annotations
 
+import copy
+import io
 import re
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from docx import Document
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT, WD_LINE_SPACING
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
+from docx.oxml import OxmlElement, parse_xml
+from docx.oxml.ns import nsdecls
 from docx.shared import Pt
 
+from .docx_styles import _QN, _prototype_docx, _set_run_font
+
 
 MAIN_SECTION_RE = re.compile(r"^[一二三四五六七八九十]+、")
-SUB_SECTION_RE = re.compile(r"^\\d+\\.\\d+")
+SUB_SECTION_RE = re.compile(r"^\d+\.\d+")
+# Classifies a stripped line in one match; alternatives are tried in the same
+# precedence as the checks they replace (heading, sub-heading, table, label).
+LINE_KIND_RE = re.compile(
+    rf"(?P<main>{MAIN_SECTION_RE.pattern})"
+    rf"|(?P<sub>{SUB_SECTION_RE.pattern})"
+    r"|(?P<table>.*\t)"
+    r"|(?P<label>.*[：:]$)"
+)
+# Paragraph template used for each non-table line kind; None is plain body text.
+_KIND_TEMPLATES = {"main": "heading1", "sub": "heading2", "label": "label", None: "body"}
 
 
 DEFAULT_LINE_SPACING = 1.3
 DEFAULT_FIRST_COL_RATIO = 0.28
 DEFAULT_CELL_MARGIN_TOP = 160
 DEFAULT_CELL_MARGIN_BOTTOM = 120
+# PAGE field run content, parsed once; each footer gets a deep copy of it.
+_PAGE_FIELD_RUN = parse_xml(
+    f'<w:r {nsdecls("w")}>'
+    '<w:fldChar w:fldCharType="begin"/>'
+    '<w:instrText xml:space="preserve">PAGE</w:instrText>'
+    '<w:fldChar w:fldCharType="end"/>'
+    '</w:r>'
+)
 
 
 def render_summary_docx(
@@ -43,94 +67,34 @@ def render_summary_docx(
     output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    doc = Document()
-    _set_document_font(doc, font_name, base_font_size, line_spacing)
+    doc = Document(io.BytesIO(_prototype_docx(font_name, base_font_size, line_spacing, ("Normal", "Heading 1", "Heading 2"))))
 
-    lines = [line.rstrip() for line in summary_text.strip().splitlines()]
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        if not line:
-            i += 1
+    # Lines are classified up front; each run of same-kind lines is emitted in
+    # one batch, paragraphs cloned from styled templates and tab-separated
+    # lines as one table.
+    templates = _paragraph_templates(doc, font_name, line_spacing)
+    for kind, group in groupby(_classify_lines(summary_text), key=itemgetter(0)):
+        texts = [text for _kind, text in group]
+        if kind == "blank":
             continue
-
-        if _is_main_section(line):
-            _add_heading(doc, line, level=1, font_name=font_name, line_spacing=line_spacing)
-            i += 1
-            continue
-
-        if _is_sub_section(line):
-            _add_heading(doc, line, level=2, font_name=font_name, line_spacing=line_spacing)
-            i += 1
-            continue
-
-        if "\t" in line:
-            rows, next_index = _collect_table_rows(lines, i)
+        if kind == "table":
             _add_table(
                 doc,
-                rows,
+                [_split_table_row(text) for text in texts],
                 font_name=font_name,
                 line_spacing=line_spacing,
                 first_col_ratio=first_col_ratio,
                 cell_margin_top=cell_margin_top,
                 cell_margin_bottom=cell_margin_bottom,
             )
-            i = next_index
-            continue
-
-        if line.endswith("：") or line.endswith(":"):
-            _add_label_paragraph(doc, line, font_name=font_name, line_spacing=line_spacing)
-            i += 1
-            continue
-
-        _add_paragraph(doc, line, font_name=font_name, line_spacing=line_spacing)
-        i += 1
+        else:
+            _emit_paragraphs(doc, templates[_KIND_TEMPLATES[kind]], texts)
 
     _add_page_numbers(doc, font_name, base_font_size)
     doc.save(output_path)
     return output_path
 
 
-def _set_document_font(doc: Document, font_name: str, base_font_size: int, line_spacing: float) -> None:
-    for style_name in ("Normal", "Heading 1", "Heading 2"):
-        if style_name not in doc.styles:
-            continue
-        style = doc.styles[style_name]
-        style.font.name = font_name
-        style.font.size = Pt(base_font_size)
-        _set_style_east_asia_font(style, font_name)
-        style.paragraph_format.line_spacing_rule = WD_LINE_SPACING.MULTIPLE
-        style.paragraph_format.line_spacing = line_spacing
-
-
-def _set_style_east_asia_font(style, font_name: str) -> None:
-    rpr = style.element.get_or_add_rPr()
-    rfonts = rpr.rFonts
-    if rfonts is None:
-        rfonts = OxmlElement("w:rFonts")
-        rpr.append(rfonts)
-    rfonts.set(qn("w:ascii"), font_name)
-    rfonts.set(qn("w:hAnsi"), font_name)
-    rfonts.set(qn("w:eastAsia"), font_name)
-
-
-def _set_run_font(run, font_name: str, size: Optional[int] = None, bold: Optional[bool] = None) -> None:
-    run.font.name = font_name
-    if size is not None:
-        run.font.size = Pt(size)
-    if bold is not None:
-        run.bold = bold
-
-    rpr = run._element.get_or_add_rPr()
-    rfonts = rpr.rFonts
-    if rfonts is None:
-        rfonts = OxmlElement("w:rFonts")
-        rpr.append(rfonts)
-    rfonts.set(qn("w:ascii"), font_name)
-    rfonts.set(qn("w:hAnsi"), font_name)
-    rfonts.set(qn("w:eastAsia"), font_name)
-
-
 def _add_heading(doc: Document, text: str, level: int, font_name: str, line_spacing: float) -> None:
     para = doc.add_paragraph()
     run = para.add_run(text)
@@ -143,22 +107,51 @@ def _add_heading(doc: Document, text: str, level: int, font_name: str, line_spac
         para.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
 
 
-def _add_paragraph(doc: Document, text: str, font_name: str, line_spacing: float) -> None:
+def _add_paragraph(doc: Document, text: str, line_spacing: float) -> None:
     para = doc.add_paragraph()
-    run = para.add_run(text)
-    _set_run_font(run, font_name)
+    para.add_run(text)
     para.paragraph_format.space_after = Pt(2)
     _apply_line_spacing(para, line_spacing)
 
 
-def _add_label_paragraph(doc: Document, text: str, font_name: str, line_spacing: float) -> None:
+def _add_label_paragraph(doc: Document, text: str, line_spacing: float) -> None:
     para = doc.add_paragraph()
     run = para.add_run(text)
-    _set_run_font(run, font_name, bold=True)
+    run.bold = True
     para.paragraph_format.space_after = Pt(2)
     _apply_line_spacing(para, line_spacing)
 
 
+def _paragraph_templates(doc: Document, font_name: str, line_spacing: float) -> Dict[str, object]:
+    """
+    Build one empty, fully styled paragraph per kind with the regular helpers,
+    then detach them from the body for cloning.
+    """
+    _add_heading(doc, "", level=1, font_name=font_name, line_spacing=line_spacing)
+    _add_heading(doc, "", level=2, font_name=font_name, line_spacing=line_spacing)
+    _add_label_paragraph(doc, "", line_spacing=line_spacing)
+    _add_paragraph(doc, "", line_spacing=line_spacing)
+    body = doc.element.body
+    built = [para._p for para in doc.paragraphs[-4:]]
+    for p in built:
+        body.remove(p)
+    return dict(zip(("heading1", "heading2", "label", "body"), built))
+
+
+def _clone_paragraph(template, text: str):
+    p = copy.deepcopy(template)
+    p.r_lst[-1].text = text
+    return p
+
+
+def _emit_paragraphs(doc: Document, template, texts: List[str]) -> None:
+    """Insert one cloned paragraph per text, all in a single body splice."""
+    body = doc.element.body
+    sect_pr = body.sectPr
+    index = body.index(sect_pr) if sect_pr is not None else len(body)
+    body[index:index] = [_clone_paragraph(template, text) for text in texts]
+
+
 def _add_table(
     doc: Document,
     rows: List[Tuple[str, str]],
@@ -174,10 +167,11 @@ def _add_table(
     table.style = "Table Grid"
     table.autofit = False
     _set_table_column_widths(doc, table, first_col_ratio)
+    tc_mar = _tc_mar_template(top=cell_margin_top, bottom=cell_margin_bottom)
     for idx, (left, right) in enumerate(rows):
         cells = table.add_row().cells
-        _set_cell_margins(cells[0], top=cell_margin_top, bottom=cell_margin_bottom)
-        _set_cell_margins(cells[1], top=cell_margin_top, bottom=cell_margin_bottom)
+        cells[0]._tc.get_or_add_tcPr().append(copy.deepcopy(tc_mar))
+        cells[1]._tc.get_or_add_tcPr().append(copy.deepcopy(tc_mar))
         _set_cell_text(cells[0], left, font_name=font_name, bold=(idx == 0), line_spacing=line_spacing)
         _set_cell_text(cells[1], right, font_name=font_name, bold=(idx == 0), line_spacing=line_spacing)
 
@@ -209,28 +203,25 @@ def _set_table_column_widths(doc: Document, table, first_col_ratio: float) -> No
         row.cells[1].width = second_width
 
 
-def _set_cell_margins(cell, top: int | None = None, bottom: int | None = None, left: int | None = None, right: int | None = None) -> None:
-    tc_pr = cell._tc.get_or_add_tcPr()
-    tc_mar = tc_pr.find(qn("w:tcMar"))
-    if tc_mar is None:
-        tc_mar = OxmlElement("w:tcMar")
-        tc_pr.append(tc_mar)
-
+def _tc_mar_template(top: int | None = None, bottom: int | None = None, left: int | None = None, right: int | None = None):
+    """Build a w:tcMar once per table; each new cell gets a deep copy."""
+    tc_mar = OxmlElement("w:tcMar")
     _set_tc_margin(tc_mar, "w:top", top)
     _set_tc_margin(tc_mar, "w:bottom", bottom)
     _set_tc_margin(tc_mar, "w:left", left)
     _set_tc_margin(tc_mar, "w:right", right)
+    return tc_mar
 
 
 def _set_tc_margin(tc_mar, tag: str, value: int | None) -> None:
     if value is None:
         return
-    node = tc_mar.find(qn(tag))
+    node = tc_mar.find(_QN[tag])
     if node is None:
         node = OxmlElement(tag)
         tc_mar.append(node)
-    node.set(qn("w:w"), str(value))
-    node.set(qn("w:type"), "dxa")
+    node.set(_QN["w:w"], str(value))
+    node.set(_QN["w:type"], "dxa")
 
 
 def _add_page_numbers(doc: Document, font_name: str, base_font_size: int) -> None:
@@ -244,42 +235,25 @@ def _add_page_numbers(doc: Document, font_name: str, base_font_size: int) -> Non
 
         run = para.add_run()
         _set_run_font(run, font_name, size=base_font_size)
+        run._r.extend(list(copy.deepcopy(_PAGE_FIELD_RUN)))
 
-        fld_char_begin = OxmlElement("w:fldChar")
-        fld_char_begin.set(qn("w:fldCharType"), "begin")
-        run._r.append(fld_char_begin)
 
-        instr_text = OxmlElement("w:instrText")
-        instr_text.set(qn("xml:space"), "preserve")
-        instr_text.text = "PAGE"
-        run._r.append(instr_text)
-
-        fld_char_end = OxmlElement("w:fldChar")
-        fld_char_end.set(qn("w:fldCharType"), "end")
-        run._r.append(fld_char_end)
-
-
-def _collect_table_rows(lines: List[str], start_index: int) -> Tuple[List[Tuple[str, str]], int]:
-    rows: List[Tuple[str, str]] = []
-    i = start_index
-    while i < len(lines):
-        line = lines[i].strip()
+def _classify_lines(summary_text: str) -> List[Tuple[Optional[str], str]]:
+    """
+    Tag each stripped line with its kind: a LINE_KIND_RE group name, None for
+    body text, or "blank" so that an empty line still ends a table.
+    """
+    tokens: List[Tuple[Optional[str], str]] = []
+    for raw in summary_text.strip().splitlines():
+        line = raw.strip()
         if not line:
-            i += 1
-            break
-        if _is_main_section(line) or _is_sub_section(line):
-            break
-        if "\t" not in line:
-            break
-        left, right = line.split("\t", 1)
-        rows.append((left.strip(), right.strip()))
-        i += 1
-    return rows, i
-
-
-def _is_main_section(line: str) -> bool:
-    return bool(MAIN_SECTION_RE.match(line))
+            tokens.append(("blank", ""))
+            continue
+        match = LINE_KIND_RE.match(line)
+        tokens.append((match.lastgroup if match else None, line))
+    return tokens
 
 
-def _is_sub_section(line: str) -> bool:
-    return bool(SUB_SECTION_RE.match(line))
+def _split_table_row(line: str) -> Tuple[str, str]:
+    left, _sep, right = line.partition("\t")
+    return left.strip(), right.strip()
@@ -6,50 +6,132 @@ Lightweight XML helpers for OOXML editing.
 
 from __future__ import annotations
 
+import copy
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
-
-from defusedxml import minidom
-
-
-def _matches_attrs(node, attrs: Optional[Dict[str, str]]) -> bool:
-    if not attrs:
-        return True
-    for key, value in attrs.items():
-        if node.getAttribute(key) != value:
-            return False
-    return True
-
-
-def _parse_fragment(fragment: str) -> List[minidom.Node]:
-    wrapper = f"<root>{fragment}</root>"
-    frag_dom = minidom.parseString(wrapper)
-    nodes = []
-    for child in frag_dom.documentElement.childNodes:
-        if child.nodeType == child.ELEMENT_NODE:
-            nodes.append(child)
-    return nodes
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from lxml import etree
+
+XML_NS = "http://www.w3.org/XML/1998/namespace"
+
+# Same guarantees as defusedxml: no entity expansion, no network access.
+_PARSER = etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=False)
+
+
+def _qualify(name: str, nsmap: Dict[Optional[str], str]) -> str:
+    """
+    Turn a prefixed name such as ``w:p`` into lxml's ``{uri}p`` form; an
+    unprefixed name resolves against the default namespace, if there is one.
+    """
+    if ":" not in name:
+        default_uri = nsmap.get(None)
+        return f"{{{default_uri}}}{name}" if default_uri else name
+    prefix, local = name.split(":", 1)
+    uri = XML_NS if prefix == "xml" else nsmap.get(prefix)
+    if not uri:
+        return name
+    return f"{{{uri}}}{local}"
+
+
+# Prefix bound to the default namespace in _find_by_attrs XPath queries.
+_DEFAULT_NS_PREFIX = "_default"
+
+
+@lru_cache(maxsize=64)
+def _compiled_xpath(expression: str, ns_items: Tuple[Tuple[str, str], ...]) -> etree.XPath:
+    return etree.XPath(expression, namespaces=dict(ns_items))
+
+
+def _find_by_attrs(root, tag: Optional[str], attrs: Dict[str, str]) -> List[etree._Element]:
+    """
+    Select nodes (root included) whose attributes equal attrs with one XPath
+    query; values are bound as XPath variables, so no escaping is needed.
+    """
+    nsmap = root.nsmap
+    used: Dict[str, str] = {}
+
+    def name_test(name: str, element: bool = False) -> Optional[str]:
+        if ":" not in name:
+            # XPath has no default namespace; bind the document's to a private
+            # prefix so unprefixed element names match as they are written.
+            default_uri = nsmap.get(None) if element else None
+            if not default_uri:
+                return name
+            used[_DEFAULT_NS_PREFIX] = default_uri
+            return f"{_DEFAULT_NS_PREFIX}:{name}"
+        prefix = name.split(":", 1)[0]
+        if prefix == "xml":
+            return name
+        uri = nsmap.get(prefix)
+        if not uri:
+            return None
+        used[prefix] = uri
+        return name
+
+    node_test = name_test(tag, element=True) if tag else "*"
+    attr_tests = [name_test(key) for key in attrs]
+    if node_test is None or None in attr_tests:
+        return []  # an undeclared prefix cannot match anything
+    predicate = " and ".join(f"@{name}=$v{index}" for index, name in enumerate(attr_tests))
+    xpath = _compiled_xpath(
+        f"descendant-or-self::{node_test}[{predicate}]", tuple(sorted(used.items()))
+    )
+    values = {f"v{index}": value for index, value in enumerate(attrs.values())}
+    return xpath(root, **values)
+
+
+@lru_cache(maxsize=64)
+def _wrapper_open_tag(ns_items: Tuple[Tuple[Optional[str], str], ...]) -> str:
+    """Opening tag of the fragment wrapper, declaring the parent's namespaces."""
+    declarations = "".join(
+        f' xmlns="{uri}"' if prefix is None else f' xmlns:{prefix}="{uri}"'
+        for prefix, uri in ns_items
+    )
+    return f"<root{declarations}>"
+
+
+@lru_cache(maxsize=128)
+def _parse_fragment_cached(
+    fragment: str, ns_items: Tuple[Tuple[Optional[str], str], ...]
+) -> Tuple[etree._Element, ...]:
+    # Every insertion under the same parent scope shares one cached wrapper tag
+    # and the module-level hardened parser.
+    wrapper = f"{_wrapper_open_tag(ns_items)}{fragment}</root>"
+    frag_root = etree.fromstring(wrapper, _PARSER)
+    return tuple(child for child in frag_root if isinstance(child.tag, str))
+
+
+def _parse_fragment(fragment: str, nsmap: Dict[Optional[str], str]) -> List[etree._Element]:
+    """Parse a fragment, reusing the parse of an identical earlier fragment; callers get fresh copies."""
+    return [copy.deepcopy(node) for node in _parse_fragment_cached(fragment, tuple(nsmap.items()))]
 
 
 class XMLEditor:
-    """Simple XML editor built on minidom."""
+    """Simple XML editor built on lxml."""
 
     def __init__(self, xml_path: str | Path):
         self.xml_path = Path(xml_path)
         if not self.xml_path.exists():
             raise FileNotFoundError(f"XML not found: {self.xml_path}")
-        self.dom = minidom.parse(str(self.xml_path))
+        self.dom = etree.parse(str(self.xml_path), _PARSER)
 
     def save(self) -> None:
-        data = self.dom.toxml(encoding="utf-8")
-        self.xml_path.write_bytes(data)
-
-    def get_nodes(self, tag: Optional[str] = None, attrs: Optional[Dict[str, str]] = None) -> List[minidom.Element]:
+        # Serialize straight to disk instead of through an intermediate bytes copy.
+        self.dom.write(
+            str(self.xml_path),
+            encoding="UTF-8",
+            xml_declaration=True,
+            standalone=self.dom.docinfo.standalone,
+        )
+
+    def get_nodes(self, tag: Optional[str] = None, attrs: Optional[Dict[str, str]] = None) -> List[etree._Element]:
+        root = self.dom.getroot()
+        if attrs:
+            return _find_by_attrs(root, tag, attrs)
         if tag:
-            nodes = self.dom.getElementsByTagName(tag)
-        else:
-            nodes = self.dom.getElementsByTagName("*")
-        return [node for node in nodes if _matches_attrs(node, attrs)]
+            return list(root.iter(_qualify(tag, root.nsmap)))
+        return list(root.iter(etree.Element))
 
     def get_node(self, tag: Optional[str] = None, attrs: Optional[Dict[str, str]] = None, line_number: Optional[int] = None):
         nodes = self.get_nodes(tag=tag, attrs=attrs)
@@ -58,36 +140,31 @@ class XMLEditor:
             return nodes[index] if index < len(nodes) else None
         return nodes[0] if nodes else None
 
-    def append_to(self, parent, xml_fragment: str) -> List[minidom.Node]:
-        nodes = _parse_fragment(xml_fragment)
-        inserted = []
-        for node in nodes:
-            imported = self.dom.importNode(node, deep=True)
-            parent.appendChild(imported)
-            inserted.append(imported)
-        return inserted
-
-    def insert_before(self, node, xml_fragment: str) -> List[minidom.Node]:
-        parent = node.parentNode
+    def append_to(self, parent, xml_fragment: str) -> List[etree._Element]:
+        return self.append_many(parent, (xml_fragment,))
+
+    def append_many(self, parent, xml_fragments: Iterable[str]) -> List[etree._Element]:
+        """Append several fragments to parent, parsing them together in one call."""
+        nodes = _parse_fragment("".join(xml_fragments), parent.nsmap)
+        parent.extend(nodes)
+        return nodes
+
+    def insert_before(self, node, xml_fragment: str) -> List[etree._Element]:
+        parent = node.getparent()
         if parent is None:
             return []
-        nodes = _parse_fragment(xml_fragment)
-        inserted = []
+        nodes = _parse_fragment(xml_fragment, parent.nsmap)
         for frag in nodes:
-            imported = self.dom.importNode(frag, deep=True)
-            parent.insertBefore(imported, node)
-            inserted.append(imported)
-        return inserted
+            node.addprevious(frag)
+        return nodes
 
-    def insert_after(self, node, xml_fragment: str) -> List[minidom.Node]:
-        parent = node.parentNode
+    def insert_after(self, node, xml_fragment: str) -> List[etree._Element]:
+        parent = node.getparent()
         if parent is None:
             return []
-        nodes = _parse_fragment(xml_fragment)
-        inserted = []
-        reference = node.nextSibling
+        nodes = _parse_fragment(xml_fragment, parent.nsmap)
+        anchor = node
         for frag in nodes:
-            imported = self.dom.importNode(frag, deep=True)
-            parent.insertBefore(imported, reference)
-            inserted.append(imported)
-        return inserted
+            anchor.addnext(frag)
+            anchor = frag
+        return nodes
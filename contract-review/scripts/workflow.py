@@ -30,14 +30,18 @@ Contract Review Standard Workflow
 """
 
 import sys
+import io
 import os
+import re
 import shutil
+import string
+import threading
 import zipfile
 import xml.etree.ElementTree as ET
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 
 # 添加技能路径
 skill_dir = Path(__file__).parent.parent
@@ -57,21 +61,30 @@ from scripts.mermaid_renderer import (
     render_mermaid_file,
     write_mermaid_file,
 )
-from scripts.ooxml.unpack import unpack_document
-from scripts.ooxml.pack import pack_document
+from scripts.ooxml.unpack import unpack_document, unpack_document_to_dict
+from scripts.ooxml.pack import DEFLATE_LEVEL, pack_document
 
 
-def _detect_output_language(*texts: Optional[str]) -> Optional[str]:
-    combined = "\n".join([text for text in texts if text])
-    if not combined:
-        return None
-    cjk_count = 0
-    latin_count = 0
-    for char in combined:
-        if "\u4e00" <= char <= "\u9fff":
-            cjk_count += 1
-        elif "A" <= char <= "Z" or "a" <= char <= "z":
-            latin_count += 1
+_W_T_TAG = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}t"
+# 合同正文中累计识别到这么多中英文字符后,比例已足以判定语言,不再继续读取
+_LANGUAGE_SAMPLE_CHARS = 4096
+_XML_CHUNK_BYTES = 64 * 1024
+# 按连续字符段匹配,由正则引擎在 C 层完成逐字符判断
+_CJK_RUN_RE = re.compile("[\u4e00-\u9fff]+")
+_LATIN_RUN_RE = re.compile("[A-Za-z]+")
+# 纯ASCII文本走 str.translate 的快速路径:删除英文字母后的长度差即字母数
+_DELETE_ASCII_LETTERS = str.maketrans("", "", string.ascii_letters)
+
+
+def _count_language_chars(text: str) -> Tuple[int, int]:
+    if text.isascii():
+        return 0, len(text) - len(text.translate(_DELETE_ASCII_LETTERS))
+    cjk_count = sum(map(len, _CJK_RUN_RE.findall(text)))
+    latin_count = sum(map(len, _LATIN_RUN_RE.findall(text)))
+    return cjk_count, latin_count
+
+
+def _language_from_counts(cjk_count: int, latin_count: int) -> Optional[str]:
     if cjk_count == 0 and latin_count == 0:
         return None
     if cjk_count >= latin_count:
@@ -79,43 +92,200 @@ def _detect_output_language(*texts: Optional[str]) -> Optional[str]:
     return "en"
 
 
-def _detect_output_language_from_contract(contract_path: Path) -> Optional[str]:
-    try:
-        with zipfile.ZipFile(contract_path) as zf:
-            xml = zf.read("word/document.xml")
-    except Exception:
+def _detect_output_language(*texts: Optional[str]) -> Optional[str]:
+    combined = "\n".join([text for text in texts if text])
+    if not combined:
         return None
+    return _language_from_counts(*_count_language_chars(combined))
+
 
+def _detect_output_language_from_contract(
+    contract_path: Path, parts: Optional[Dict[str, bytes]] = None
+) -> Optional[str]:
+    """
+    根据合同正文判断输出语言
+
+    parts 为已读入内存的合同部件(见 unpack_document_to_dict)时直接使用,不再打开压缩包。
+    """
     try:
-        root = ET.fromstring(xml)
+        if parts is not None:
+            return _detect_output_language_from_xml(io.BytesIO(parts["word/document.xml"]))
+        with zipfile.ZipFile(contract_path) as zf, zf.open("word/document.xml") as stream:
+            return _detect_output_language_from_xml(stream)
     except Exception:
         return None
 
-    ns = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
-    texts = []
-    for node in root.findall(".//w:t", ns):
-        if node.text:
-            texts.append(node.text)
-    combined = "".join(texts)
-    return _detect_output_language(combined)
-
-
-_CN_SECTION_LABELS = {
-    1: "一",
-    2: "二",
-    3: "三",
-    4: "四",
-    5: "五",
-    6: "六",
-    7: "七",
-    8: "八",
-    9: "九",
-    10: "十",
-}
+
+class _LanguageCountTarget:
+    """XMLParser 回调目标:只统计 w:t 文本中的中英文字符,不构建任何元素"""
+
+    def __init__(self):
+        self.cjk_count = 0
+        self.latin_count = 0
+        self._text = None  # type: Optional[List[str]]
+
+    def start(self, tag, attrib):
+        if tag == _W_T_TAG:
+            self._text = []
+
+    def data(self, data):
+        if self._text is not None:
+            self._text.append(data)
+
+    def end(self, tag):
+        if self._text is not None:
+            cjk, latin = _count_language_chars("".join(self._text))
+            self.cjk_count += cjk
+            self.latin_count += latin
+            self._text = None
+
+    def close(self):
+        return None
+
+
+def _detect_output_language_from_xml(stream) -> Optional[str]:
+    # 分块流式解析 word/document.xml,样本足够时提前结束
+    target = _LanguageCountTarget()
+    parser = ET.XMLParser(target=target)
+    for chunk in iter(lambda: stream.read(_XML_CHUNK_BYTES), b""):
+        parser.feed(chunk)
+        if target.cjk_count + target.latin_count > _LANGUAGE_SAMPLE_CHARS:
+            break
+    return _language_from_counts(target.cjk_count, target.latin_count)
+
+
+class _SmartKeywordIndex:
+    """
+    智能关键词的倒排索引
+
+    与逐字段扫描的宽松匹配等价:返回第一个满足"标准化关键词相等、
+    用户关键词是其子串或其是用户关键词子串"的字段对应的关键词列表。
+    """
+
+    def __init__(self, smart_keywords: Dict[str, List[str]]):
+        self._fields: List[List[str]] = []
+        # 标准化关键词的所有子串 -> 最靠前的字段序号(覆盖"用户关键词 in nk")
+        self._substrings: Dict[str, int] = {}
+        # 标准化关键词本身 -> 最靠前的字段序号(覆盖"nk in 用户关键词")
+        self._exact: Dict[str, int] = {}
+        for index, keywords in enumerate(smart_keywords.values()):
+            self._fields.append(keywords)
+            for keyword in keywords:
+                nk = keyword.rstrip(':：')
+                self._exact.setdefault(nk, index)
+                for start in range(len(nk) + 1):
+                    for end in range(start, len(nk) + 1):
+                        self._substrings.setdefault(nk[start:end], index)
+        self._exact_lengths = sorted({len(nk) for nk in self._exact})
+
+    def match(self, keyword: str) -> Optional[List[str]]:
+        normalized = keyword.rstrip(':：')
+        best = self._substrings.get(normalized)
+        for length in self._exact_lengths:
+            if length > len(normalized):
+                break
+            for start in range(len(normalized) - length + 1):
+                index = self._exact.get(normalized[start:start + length])
+                if index is not None and (best is None or index < best):
+                    best = index
+        return None if best is None else self._fields[best]
+
+
+# 步骤标题与报告分节使用的分隔线
+_H_RULE = "=" * 60
+_DIV = "-" * 60
+# 报告中整行写入的分隔线(含换行)
+_EQ_LINE = _H_RULE + "\n"
+_DASH_LINE = _DIV + "\n"
+
+# 批注正文中需要移除的风险等级行标记
+_RISK_LABEL = "风险等级"
+
+
+# 下标即章节序号(0 号位占位),超出范围时退回阿拉伯数字
+_CN_SECTION_LABELS = ("", "一", "二", "三", "四", "五", "六", "七", "八", "九", "十")
 
 
 def _section_cn(index: int) -> str:
-    return _CN_SECTION_LABELS.get(index, str(index))
+    return _CN_SECTION_LABELS[index] if 1 <= index <= 10 else str(index)
+
+
+# 审核报告的分语言文案;section_number 把章节序号转成标题编号,
+# 含 {…} 的条目按 str.format 填充
+_REPORT_LABELS = {
+    "en": {
+        "section_number": str,
+        "heading": "{number}. {title}\n",
+        "title": "Contract Review Comment Report",
+        "basic_info": "Basic Information",
+        "reviewer": "Reviewer",
+        "document": "Document",
+        "review_time": "Review Time",
+        "duration": "Duration: {seconds:.2f} seconds",
+        "failed": "Failed ({error})",
+        "summary": "Contract Summary",
+        "opinion": "Consolidated Opinion",
+        "flowchart_image": "Flowchart Image",
+        "flowchart_source": "Flowchart Source",
+        "statistics": "Comment Statistics",
+        "added": "Added Successfully: {count}",
+        "exact_match": "  - Exact Match: {count} ({rate:.1f}%)",
+        "fallback_match": "  - Fallback: {count} ({rate:.1f}%)",
+        "failed_count": "Failed: {count}",
+        "success_rate": "Success Rate",
+        "fallback_details": "Fallback Comment Details",
+        "fallback_intro": "{count} comments were added to the document title because no exact match was found.",
+        "fallback_entry": "{index}. Search Text: {search}\n   Risk Level: {risk_level}\n\n",
+        "fallback_note": "Note: These comments may require manual location in the document.",
+        "failure_details": "Failed Comment Details",
+        "failure_entry": "{index}. Search Text: {search}\n   Failure Reason: {reason}\n\n",
+        "other_errors": "Other Step Errors",
+        "other_entry": "{index}. Step: {step}\n   Error: {error}\n\n",
+        "verification": "Verification Results",
+        "total_comments": "Total Comments",
+        "references_found": "References Found",
+        "missing_references": "Missing References",
+        "comment_list": "Comment List",
+        "comment_entry": "{index}. [ID:{id}] {author}\n   Preview: {preview}\n\n",
+        "generated_at": "Report Generated At",
+    },
+    "zh": {
+        "section_number": _section_cn,
+        "heading": "{number}、{title}\n",
+        "title": "合同审核批注报告",
+        "basic_info": "基本信息",
+        "reviewer": "审核人",
+        "document": "文档",
+        "review_time": "审核时间",
+        "duration": "执行时长: {seconds:.2f} 秒",
+        "failed": "生成失败 ({error})",
+        "summary": "合同概要",
+        "opinion": "综合审核意见",
+        "flowchart_image": "流程图图片",
+        "flowchart_source": "流程图源码",
+        "statistics": "批注统计",
+        "added": "成功添加: {count} 个",
+        "exact_match": "  ├── 精准匹配: {count} 个 ({rate:.1f}%)",
+        "fallback_match": "  └── Fallback: {count} 个 ({rate:.1f}%)",
+        "failed_count": "添加失败: {count} 个",
+        "success_rate": "成功率",
+        "fallback_details": "Fallback批注详情",
+        "fallback_intro": "以下{count}个批注因未找到精确匹配,已添加到文档标题:",
+        "fallback_entry": "{index}. 搜索文本: {search}\n   风险等级: {risk_level}\n\n",
+        "fallback_note": "注意: 这些批注可能需要您手动定位到相关条款。",
+        "failure_details": "失败批注详情",
+        "failure_entry": "{index}. 搜索文本: {search}\n   失败原因: {reason}\n\n",
+        "other_errors": "其他步骤错误",
+        "other_entry": "{index}. 步骤: {step}\n   错误信息: {error}\n\n",
+        "verification": "验证结果",
+        "total_comments": "批注总数",
+        "references_found": "文档引用",
+        "missing_references": "缺失引用",
+        "comment_list": "批注列表",
+        "comment_entry": "{index}. [ID:{id}] {author}\n   预览: {preview}\n\n",
+        "generated_at": "报告生成时间",
+    },
+}
 
 
 class ContractReviewWorkflow:
@@ -159,11 +329,28 @@ class ContractReviewWorkflow:
 
         self.output_dir = Path(output_dir)
         self.unpacked_dir = None
+        # 语言检测时已读入内存的合同部件,步骤1解包时复用
+        self._contract_parts = None  # type: Optional[Dict[str, bytes]]
         self.doc = None
+        # 关键词序列 -> (段落, 命中关键词, 是否fallback),随 self.doc 重建而清空
+        self._para_cache = {}  # type: Dict[tuple, tuple]
+        # step4 的验证结果,供报告复用;添加批注或重建 self.doc 时作废
+        self._verification_cache = None  # type: Optional[Dict]
         self.comments_added = []  # type: List[Dict]
+        # 随 comments_added 同步维护的精准匹配数与 fallback 批注
+        self._precise_count = 0
+        self._fallback_matches = []  # type: List[Dict]
         self.comments_failed = []  # type: List[Dict]
+        # 概要/意见/流程图可能与批注步骤并行执行,记录失败时需加锁
+        self._failures_lock = threading.Lock()
+        # 并行的输出步骤会写入概要/意见/流程图结果属性,更新时加锁
+        self._outputs_lock = threading.Lock()
+        # 后台执行的输出步骤把控制台信息写入各自线程的缓冲区
+        self._step_output = threading.local()
         self.start_time = datetime.now()
-        self.contract_analyzer = None  # type: Optional[ContractAnalyzer]
+        # 智能分析器在首次访问 contract_analyzer 时才创建(步骤3启用智能扩展时)
+        self._contract_analyzer = None  # type: Optional[ContractAnalyzer]
+        self._contract_analyzer_loaded = not enable_analysis
         self.flowchart_mmd_path = None  # type: Optional[Path]
         self.flowchart_image_path = None  # type: Optional[Path]
         self.flowchart_error = None  # type: Optional[str]
@@ -172,22 +359,38 @@ class ContractReviewWorkflow:
         self.summary_error = None  # type: Optional[str]
         self.opinion_path = None  # type: Optional[Path]
         self.opinion_error = None  # type: Optional[str]
+        # 概要/意见/流程图文件是否存在,清理与最终总结共用;重新生成输出时作废
+        self._output_presence = None  # type: Optional[Dict[str, bool]]
 
         # 创建输出目录
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
-        # 初始化智能分析器
-        if self.enable_analysis:
+    @property
+    def contract_analyzer(self) -> Optional[ContractAnalyzer]:
+        """
+        智能合同分析器
+
+        首次访问时才分析合同并打印摘要,也可直接赋值替换;未启用分析或初始化失败时为None。
+        """
+        if not self._contract_analyzer_loaded:
+            self._contract_analyzer_loaded = True
             try:
                 print(f"\n🔍 初始化智能合同分析...")
-                self.contract_analyzer = ContractAnalyzer(str(self.contract_path))
-                summary = self.contract_analyzer.get_contract_summary()
+                analyzer = ContractAnalyzer(str(self.contract_path))
+                summary = analyzer.get_contract_summary()
                 print(f"✓ 合同类型: {summary['contract_type']}")
                 print(f"✓ 段落数量: {summary['total_paragraphs']}")
                 print(f"✓ 识别字段: {summary['found_fields']}个")
+                self._contract_analyzer = analyzer
             except Exception as e:
                 print(f"⚠️  智能分析初始化失败: {e}")
                 print(f"  将继续使用标准模式")
+        return self._contract_analyzer
+
+    @contract_analyzer.setter
+    def contract_analyzer(self, analyzer: Optional[ContractAnalyzer]) -> None:
+        self._contract_analyzer = analyzer
+        self._contract_analyzer_loaded = True
 
     @staticmethod
     def _strip_risk_level_line(comment_text: str) -> str:
@@ -200,8 +403,10 @@ class ContractReviewWorkflow:
         if not comment_text:
             return comment_text
 
-        lines = comment_text.splitlines()
-        kept = [line for line in lines if "风险等级" not in line]
+        kept = comment_text.splitlines()
+        # 多数批注本就不含风险等级行,整段一次查找即可跳过逐行过滤
+        if _RISK_LABEL in comment_text:
+            kept = [line for line in kept if _RISK_LABEL not in line]
 
         cleaned = []
         previous_blank = False
@@ -221,6 +426,97 @@ class ContractReviewWorkflow:
 
         return "\n".join(cleaned)
 
+    def _get_verification(self) -> Dict:
+        """返回批注验证结果,优先复用 step4 的结果"""
+        if self._verification_cache is None:
+            self._verification_cache = self.doc.verify_comments()
+        return self._verification_cache
+
+    def _get_output_presence(self) -> Dict[str, bool]:
+        """返回概要/意见/流程图输出文件是否存在,每个文件只检查一次"""
+        with self._outputs_lock:
+            if self._output_presence is None:
+                self._output_presence = {
+                    'summary': bool(self.summary_path and self.summary_path.exists()),
+                    'opinion': bool(self.opinion_path and self.opinion_path.exists()),
+                    'flowchart_image': bool(
+                        self.flowchart_rendered and self.flowchart_image_path and self.flowchart_image_path.exists()
+                    ),
+                    'flowchart_mmd': bool(self.flowchart_mmd_path and self.flowchart_mmd_path.exists()),
+                }
+            return self._output_presence
+
+    def _set_outputs(self, **attrs) -> None:
+        """更新概要/意见/流程图结果属性并作废文件存在性缓存(线程安全)"""
+        with self._outputs_lock:
+            for name, value in attrs.items():
+                setattr(self, name, value)
+            self._output_presence = None
+
+    def _log(self, *args) -> None:
+        """输出步骤的控制台信息;在后台线程执行时写入该步骤自己的缓冲区"""
+        print(*args, file=getattr(self._step_output, "buffer", None))
+
+    def _run_output_step(self, step, *args) -> tuple:
+        """在后台线程运行输出步骤并缓冲其控制台信息,返回 (结果, 异常, 输出文本)"""
+        buffer = io.StringIO()
+        self._step_output.buffer = buffer
+        try:
+            return step(*args), None, buffer.getvalue()
+        except Exception as e:
+            return False, e, buffer.getvalue()
+        finally:
+            self._step_output.buffer = None
+
+    def _record_step_failure(self, step: str, error: Exception) -> None:
+        """记录步骤失败(线程安全,供与批注步骤并行的输出步骤使用)"""
+        with self._failures_lock:
+            self.comments_failed.append({
+                'step': step,
+                'error': str(error)
+            })
+
+    def _resolve_comment_target(self, comment_data: Dict, keyword_index: Optional[_SmartKeywordIndex]) -> tuple:
+        """
+        定位单条批注的目标段落(只读,不修改文档)
+
+        Returns:
+            tuple: (search_keywords, comment_text, risk_level, para, matched_keyword, used_fallback)
+        """
+        # 获取搜索文本和批注内容
+        search_text = comment_data['search']
+        comment_text = comment_data['comment']
+        comment_text = self._strip_risk_level_line(comment_text)
+        risk_level = comment_data.get('risk_level', '中风险')  # 默认中风险
+
+        # 支持多关键词搜索
+        search_keywords = [search_text] if isinstance(search_text, str) else search_text
+
+        # 智能优化:如果启用扩展,尝试扩展关键词
+        if len(search_keywords) == 1 and self.enable_smart_keyword_expansion and keyword_index:
+            original_keyword = search_keywords[0]
+            # 宽松匹配:如果用户搜索"合同编号",匹配包含"编号"的字段
+            keywords = keyword_index.match(original_keyword)
+            if keywords is not None:
+                # 使用完整的原始关键词列表
+                search_keywords = keywords
+                print(f"  🧠 智能扩展: '{original_keyword}' -> {keywords}")
+
+        # 相同关键词序列的定位结果可复用:批注只插入标记,不改变段落文本
+        cache_key = tuple(search_keywords)
+        cached = self._para_cache.get(cache_key)
+        if cached is None:
+            # 使用跨节点搜索查找目标段落 (允许fallback到标题),搜索时即得到命中的关键词
+            para, matched_keyword = self.doc.find_paragraph_with_keyword(search_keywords, allow_fallback=True)
+
+            # 没有命中任何关键词即为fallback
+            used_fallback = matched_keyword is None
+            if used_fallback:
+                matched_keyword = search_keywords[0]
+            cached = self._para_cache[cache_key] = (para, matched_keyword, used_fallback)
+        para, matched_keyword, used_fallback = cached
+        return search_keywords, comment_text, risk_level, para, matched_keyword, used_fallback
+
     def _ensure_output_dir_for_language(self, output_language: Optional[str]) -> None:
         if output_language != "en" or not self.output_dir_default:
             return
@@ -248,15 +544,17 @@ class ContractReviewWorkflow:
         Returns:
             bool: 成功返回True,失败返回False
         """
-        print(f"\n{'='*60}")
+        print(f"\n{_H_RULE}")
         print(f"步骤0: 复制原合同")
-        print(f"{'='*60}")
+        print(_H_RULE)
         print(f"📄 复制原合同到审核目录...")
 
         try:
             # 复制原合同到输出目录
             target_path = self.output_dir / self.contract_path.name
-            shutil.copy2(self.contract_path, target_path)
+            # 数据部分 copyfile 在 Linux 上直接走 sendfile 零拷贝,随后补上修改时间与权限位
+            shutil.copyfile(self.contract_path, target_path)
+            shutil.copystat(self.contract_path, target_path)
             print(f"✓ 已复制原合同: {target_path.name}")
             print(f"  📁 审核目录: {self.output_dir}")
             return True
@@ -283,9 +581,9 @@ class ContractReviewWorkflow:
         Returns:
             bool: 成功返回True,失败返回False
         """
-        print(f"\n{'='*60}")
+        print(f"\n{_H_RULE}")
         print(f"步骤1: 解包文档")
-        print(f"{'='*60}")
+        print(_H_RULE)
         print(f"📦 解包文档: {self.contract_path.name}")
 
         try:
@@ -294,7 +592,8 @@ class ContractReviewWorkflow:
 
             # 在输出目录中创建解包子目录
             self.unpacked_dir = str(self.output_dir / unpacked_subdir)
-            unpack_document(str(contract_copy), self.unpacked_dir)
+            unpack_document(str(contract_copy), self.unpacked_dir, parts=self._contract_parts)
+            self._contract_parts = None
             print(f"✓ 解包完成: {self.unpacked_dir}")
             return True
         except Exception as e:
@@ -314,9 +613,9 @@ class ContractReviewWorkflow:
         Returns:
             bool: 成功返回True,失败返回False
         """
-        print(f"\n{'='*60}")
+        print(f"\n{_H_RULE}")
         print(f"步骤2: 初始化文档对象")
-        print(f"{'='*60}")
+        print(_H_RULE)
         print(f"🔧 初始化Document对象")
 
         try:
@@ -325,6 +624,8 @@ class ContractReviewWorkflow:
                 author=self.reviewer_name,
                 initials=self.reviewer_initials
             )
+            self._para_cache.clear()
+            self._verification_cache = None
             print(f"✓ 初始化完成")
             print(f"  - 审核人: {self.reviewer_name}")
             print(f"  - 工作目录: {self.unpacked_dir}")
@@ -360,66 +661,43 @@ class ContractReviewWorkflow:
         Returns:
             bool: 全部成功返回True,部分或全部失败返回False
         """
-        print(f"\n{'='*60}")
+        print(f"\n{_H_RULE}")
         print(f"步骤3: 添加批注 (使用跨节点搜索 + 精准匹配优先)")
-        print(f"{'='*60}")
+        print(_H_RULE)
         print(f"💬 添加 {len(comments)} 个批注...")
 
+        self._verification_cache = None
+
         smart_keywords = None
-        if self.contract_analyzer:
+        keyword_index = None
+        # 只有启用智能扩展时才需要分析合同
+        if self.enable_smart_keyword_expansion and self.contract_analyzer:
             smart_keywords = self.contract_analyzer.generate_smart_search_keywords()
             print(f"\n🧠 智能搜索关键词建议:")
             for field, keywords in list(smart_keywords.items())[:3]:  # 只显示前3个
                 print(f"   {field}: {keywords}")
+            keyword_index = _SmartKeywordIndex(smart_keywords)
 
         all_success = True
-        precise_match_count = 0
-        fallback_count = 0
 
-        for i, comment_data in enumerate(comments, 1):
+        # 阶段A(只读):先为全部批注定位目标段落,不修改文档
+        resolved = []
+        for comment_data in comments:
             try:
-                # 获取搜索文本和批注内容
-                search_text = comment_data['search']
-                comment_text = comment_data['comment']
-                comment_text = self._strip_risk_level_line(comment_text)
-                risk_level = comment_data.get('risk_level', '中风险')  # 默认中风险
-
-                # 支持多关键词搜索
-                search_keywords = [search_text] if isinstance(search_text, str) else search_text
-
-                # 智能优化:如果启用扩展,尝试扩展关键词
-                if len(search_keywords) == 1 and self.enable_smart_keyword_expansion and smart_keywords:
-                    original_keyword = search_keywords[0]
-                    # 标准化关键词(去除标点符号)进行模糊匹配
-                    normalized_original = original_keyword.rstrip(':：')
-
-                    # 查找包含标准化关键词的字段(使用更宽松的匹配)
-                    for field, keywords in smart_keywords.items():
-                        # 标准化该字段的所有关键词
-                        normalized_keywords = [k.rstrip(':：') for k in keywords]
-
-                        # 宽松匹配:如果用户搜索"合同编号",匹配包含"编号"的字段
-                        if (normalized_original in normalized_keywords or
-                            any(normalized_original in nk or nk in normalized_original
-                                for nk in normalized_keywords)):
-                            # 使用完整的原始关键词列表
-                            search_keywords = keywords
-                            print(f"  🧠 智能扩展: '{original_keyword}' -> {keywords}")
-                            break
-
-                # 使用跨节点搜索查找目标段落 (允许fallback到标题)
-                para = self.doc.find_paragraph_by_text(search_keywords, allow_fallback=True)
-
-                # 判断是否使用了fallback (检查段落是否包含任一关键词)
-                para_text = self.doc.get_paragraph_text(para)
-                used_fallback = not any(keyword in para_text for keyword in search_keywords)
+                resolved.append(self._resolve_comment_target(comment_data, keyword_index))
+            except Exception as e:
+                resolved.append(e)
 
-                if used_fallback:
-                    fallback_count += 1
-                    match_type = "🔄 Fallback到标题"
-                else:
-                    precise_match_count += 1
-                    match_type = "🎯 精准匹配"
+        # 阶段B(写入):按原顺序逐条添加批注,保证批注ID确定
+        # 失败数单独计数:并行生成的输出步骤也会向 comments_failed 写入
+        failed_count = 0
+        for i, (comment_data, target) in enumerate(zip(comments, resolved), 1):
+            try:
+                if isinstance(target, Exception):
+                    raise target
+                search_keywords, comment_text, risk_level, para, matched_keyword, used_fallback = target
+
+                match_type = "🔄 Fallback到标题" if used_fallback else "🎯 精准匹配"
 
                 # 添加批注(包含风险等级)
                 comment_id = self.doc.add_comment(
@@ -428,35 +706,40 @@ class ContractReviewWorkflow:
                     text=comment_text,
                     risk_level=risk_level
                 )
-                self.comments_added.append({
+                added = {
                     'id': comment_id,
                     'search': search_keywords[0] if len(search_keywords) == 1 else search_keywords,
                     'risk_level': risk_level,
                     'status': 'success',
                     'fallback_used': used_fallback
-                })
+                }
+                self.comments_added.append(added)
+                if used_fallback:
+                    self._fallback_matches.append(added)
+                else:
+                    self._precise_count += 1
 
                 # 显示匹配的关键词
-                matched_keyword = search_keywords[0] if used_fallback else next((k for k in search_keywords if k in para_text), search_keywords[0])
                 print(f"✓ {i}/{len(comments)}: {match_type} - {matched_keyword[:40]}")
 
             except Exception as e:
                 # 添加批注时出错
-                self.comments_failed.append({
-                    'search': comment_data.get('search', 'unknown'),
-                    'reason': str(e)
-                })
+                failed_count += 1
+                with self._failures_lock:
+                    self.comments_failed.append({
+                        'search': comment_data.get('search', 'unknown'),
+                        'reason': str(e)
+                    })
                 print(f"✗ {i}/{len(comments)}: 失败 - {str(e)[:80]}")
 
         # 打印详细统计
         success_count = len(self.comments_added)
-        failed_count = len(self.comments_failed)
-        precision_rate = precise_match_count / success_count * 100 if success_count > 0 else 0
+        precision_rate = self._precise_count / success_count * 100 if success_count > 0 else 0
 
         print(f"\n批注添加完成:")
         print(f"  ✓ 成功: {success_count} 个")
-        print(f"    ├── 🎯 精准匹配: {precise_match_count} 个 ({precision_rate:.1f}%)")
-        print(f"    └── 🔄 Fallback: {fallback_count} 个 ({100-precision_rate:.1f}%)")
+        print(f"    ├── 🎯 精准匹配: {self._precise_count} 个 ({precision_rate:.1f}%)")
+        print(f"    └── 🔄 Fallback: {len(self._fallback_matches)} 个 ({100-precision_rate:.1f}%)")
         print(f"  ✗ 失败: {failed_count} 个")
 
         # 检查是否达到90%精准匹配目标
@@ -481,12 +764,12 @@ class ContractReviewWorkflow:
         Returns:
             dict: 验证结果字典
         """
-        print(f"\n{'='*60}")
+        print(f"\n{_H_RULE}")
         print(f"步骤4: 验证批注")
-        print(f"{'='*60}")
+        print(_H_RULE)
         print(f"🔍 验证批注是否成功添加...")
 
-        verification = self.doc.verify_comments()
+        verification = self._verification_cache = self.doc.verify_comments()
 
         print(f"\n验证结果:")
         print(f"  📊 批注总数: {verification['total']}")
@@ -508,7 +791,7 @@ class ContractReviewWorkflow:
 
         return verification
 
-    def step5_save(self, output_filename: str = None, validate: bool = True) -> bool:
+    def step5_save(self, output_filename: str = None, validate: bool = True, fast_pack: bool = False) -> bool:
         """
         步骤5: 保存并打包文档
 
@@ -518,13 +801,14 @@ class ContractReviewWorkflow:
         Args:
             output_filename: 输出文件名(如"合同_审核版.docx"),如果为None则使用原文件名加上"_reviewed"后缀
             validate: 是否验证文档
+            fast_pack: 是否使用最快压缩级别打包(默认False,文件约大三分之一)
 
         Returns:
             bool: 成功返回True,失败返回False
         """
-        print(f"\n{'='*60}")
+        print(f"\n{_H_RULE}")
         print(f"步骤5: 保存并打包文档")
-        print(f"{'='*60}")
+        print(_H_RULE)
         print(f"💾 保存文档...")
 
         try:
@@ -541,7 +825,9 @@ class ContractReviewWorkflow:
             output_path = str(self.output_dir / output_filename)
 
             # 打包为.docx文件
-            pack_document(self.doc.unpacked_path, output_path, validate=False)
+            # fast_pack 使用最低压缩级别,以更大的文件换取更短的打包时间
+            compresslevel = 1 if fast_pack else DEFLATE_LEVEL
+            pack_document(self.doc.unpacked_path, output_path, validate=False, compresslevel=compresslevel)
             file_size = Path(output_path).stat().st_size / 1024  # KB
             print(f"✓ 文档已打包: {output_path} ({file_size:.1f} KB)")
 
@@ -549,10 +835,7 @@ class ContractReviewWorkflow:
         except Exception as e:
             print(f"✗ 保存失败: {e}")
             print(f"  提示: 如果遇到验证错误,可以尝试设置 validate=False")
-            self.comments_failed.append({
-                'step': 'save',
-                'error': str(e)
-            })
+            self._record_step_failure('save', e)
             return False
 
     def step6_generate_summary(
@@ -574,31 +857,30 @@ class ContractReviewWorkflow:
         Returns:
             bool: 成功返回True,失败返回False
         """
-        print(f"\n{'='*60}")
-        print(f"步骤6: 合同概要提取")
-        print(f"{'='*60}")
-        print(f"🧾 生成合同概要...")
+        self._log(f"\n{_H_RULE}")
+        self._log(f"步骤6: 合同概要提取")
+        self._log(_H_RULE)
+        self._log(f"🧾 生成合同概要...")
 
         if not summary_text:
-            print("⚠️  未提供合同概要内容,跳过该步骤")
+            self._log("⚠️  未提供合同概要内容,跳过该步骤")
             return True
 
+        self._set_outputs()
+
         try:
             content = summary_text.strip()
             if not content.endswith("\n"):
                 content += "\n"
             summary_path = self.output_dir / summary_filename
             render_summary_docx(content, summary_path, font_name=summary_font)
-            self.summary_path = summary_path
-            print(f"✓ 已生成合同概要: {summary_path.name}")
+            self._set_outputs(summary_path=summary_path)
+            self._log(f"✓ 已生成合同概要: {summary_path.name}")
             return True
         except Exception as e:
-            self.summary_error = str(e)
-            self.comments_failed.append({
-                'step': 'summary',
-                'error': str(e)
-            })
-            print(f"✗ 合同概要生成失败: {e}")
+            self._set_outputs(summary_error=str(e))
+            self._record_step_failure('summary', e)
+            self._log(f"✗ 合同概要生成失败: {e}")
             return False
 
     def step7_generate_opinion(
@@ -620,15 +902,17 @@ class ContractReviewWorkflow:
         Returns:
             bool: 成功返回True,失败返回False
         """
-        print(f"\n{'='*60}")
-        print(f"步骤7: 生成综合审核意见")
-        print(f"{'='*60}")
-        print(f"📝 生成综合审核意见...")
+        self._log(f"\n{_H_RULE}")
+        self._log(f"步骤7: 生成综合审核意见")
+        self._log(_H_RULE)
+        self._log(f"📝 生成综合审核意见...")
 
         if not opinion_text:
-            print("⚠️  未提供综合审核意见内容,跳过该步骤")
+            self._log("⚠️  未提供综合审核意见内容,跳过该步骤")
             return True
 
+        self._set_outputs()
+
         try:
             content = opinion_text.strip()
             if not content.endswith("\n"):
@@ -643,16 +927,13 @@ class ContractReviewWorkflow:
                 font_name=opinion_font,
                 title_text=title_text,
             )
-            self.opinion_path = opinion_path
-            print(f"✓ 已生成综合审核意见: {opinion_path.name}")
+            self._set_outputs(opinion_path=opinion_path)
+            self._log(f"✓ 已生成综合审核意见: {opinion_path.name}")
             return True
         except Exception as e:
-            self.opinion_error = str(e)
-            self.comments_failed.append({
-                'step': 'opinion',
-                'error': str(e)
-            })
-            print(f"✗ 综合审核意见生成失败: {e}")
+            self._set_outputs(opinion_error=str(e))
+            self._record_step_failure('opinion', e)
+            self._log(f"✗ 综合审核意见生成失败: {e}")
             return False
 
     def step6_generate_flowchart(
@@ -681,29 +962,28 @@ class ContractReviewWorkflow:
         Returns:
             bool: 成功返回True,失败返回False
         """
-        print(f"\n{'='*60}")
-        print(f"步骤8: 生成业务流程图")
-        print(f"{'='*60}")
-        print(f"🗺️  生成业务流程图...")
+        self._log(f"\n{_H_RULE}")
+        self._log(f"步骤8: 生成业务流程图")
+        self._log(_H_RULE)
+        self._log(f"🗺️  生成业务流程图...")
 
         if not mermaid_code:
-            print("⚠️  未提供Mermaid流程图代码,跳过该步骤")
+            self._log("⚠️  未提供Mermaid流程图代码,跳过该步骤")
             return True
 
-        self.flowchart_error = None
-        self.flowchart_rendered = False
+        self._set_outputs(flowchart_error=None, flowchart_rendered=False)
 
         try:
             normalized = normalize_mermaid_code(mermaid_code)
-            self.flowchart_mmd_path = write_mermaid_file(
+            self._set_outputs(flowchart_mmd_path=write_mermaid_file(
                 normalized,
                 self.output_dir,
                 mmd_filename,
-            )
-            print(f"✓ 已保存Mermaid源文件: {self.flowchart_mmd_path.name}")
+            ))
+            self._log(f"✓ 已保存Mermaid源文件: {self.flowchart_mmd_path.name}")
 
             image_path = self.output_dir / image_filename
-            self.flowchart_image_path = image_path
+            self._set_outputs(flowchart_image_path=image_path)
             if render_image:
                 if image_path.exists():
                     try:
@@ -716,26 +996,23 @@ class ContractReviewWorkflow:
                     theme=theme,
                     background_color=background_color,
                 )
-                self.flowchart_rendered = True
-                print(f"✓ 已渲染流程图图片: {self.flowchart_image_path.name}")
+                self._set_outputs(flowchart_rendered=True)
+                self._log(f"✓ 已渲染流程图图片: {self.flowchart_image_path.name}")
             else:
-                print("⚠️  已跳过图片渲染(仅保存.mmd文件)")
+                self._log("⚠️  已跳过图片渲染(仅保存.mmd文件)")
 
             return True
         except Exception as e:
-            self.flowchart_error = str(e)
-            self.comments_failed.append({
-                'step': 'flowchart',
-                'error': str(e)
-            })
+            self._set_outputs(flowchart_error=str(e))
+            self._record_step_failure('flowchart', e)
             if self.flowchart_image_path and self.flowchart_image_path.exists():
                 try:
                     self.flowchart_image_path.unlink()
                 except Exception:
                     pass
-            print(f"✗ 流程图生成失败: {e}")
+            self._log(f"✗ 流程图生成失败: {e}")
             if isinstance(e, FileNotFoundError):
-                print("  提示: 请安装 Mermaid CLI: npm i -g @mermaid-js/mermaid-cli")
+                self._log("  提示: 请安装 Mermaid CLI: npm i -g @mermaid-js/mermaid-cli")
             return False
 
     def step7_generate_report(self, report_filename: str = "review_report.txt") -> bool:
@@ -757,221 +1034,143 @@ class ContractReviewWorkflow:
         Returns:
             bool: 成功返回True,失败返回False
         """
-        print(f"\n{'='*60}")
+        print(f"\n{_H_RULE}")
         print(f"步骤9: 生成审核报告")
-        print(f"{'='*60}")
+        print(_H_RULE)
         print(f"📄 生成审核报告...")
 
         try:
-            duration = (datetime.now() - self.start_time).total_seconds()
+            # 审核时间、报告生成时间与执行时长共用同一时刻
+            now = datetime.now()
+            now_str = now.strftime('%Y-%m-%d %H:%M:%S')
+            duration = (now - self.start_time).total_seconds()
 
             # 构建完整的报告路径
             report_path = str(self.output_dir / report_filename)
 
-            precise_matches = [c for c in self.comments_added if not c.get('fallback_used', False)]
-            fallback_matches = [c for c in self.comments_added if c.get('fallback_used', False)]
+            precise_count = self._precise_count
+            fallback_matches = self._fallback_matches
             comment_failures = [c for c in self.comments_failed if 'search' in c]
             other_failures = [c for c in self.comments_failed if 'search' not in c]
-            language = self.output_language or "zh"
-
-            with open(report_path, 'w', encoding='utf-8') as f:
-                if language == "en":
-                    f.write("=" * 60 + "\n")
-                    f.write("Contract Review Comment Report\n")
-                    f.write("=" * 60 + "\n\n")
-
-                    f.write("1. Basic Information\n")
-                    f.write("-" * 60 + "\n")
-                    f.write(f"Reviewer: {self.reviewer_name}\n")
-                    f.write(f"Document: {self.contract_path}\n")
-                    f.write(f"Review Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    f.write(f"Duration: {duration:.2f} seconds\n")
-                    if self.summary_path or self.summary_error:
-                        if self.summary_path:
-                            f.write(f"Contract Summary: {self.summary_path.name}\n")
-                        elif self.summary_error:
-                            f.write(f"Contract Summary: Failed ({self.summary_error})\n")
-                    if self.opinion_path or self.opinion_error:
-                        if self.opinion_path:
-                            f.write(f"Consolidated Opinion: {self.opinion_path.name}\n")
-                        elif self.opinion_error:
-                            f.write(f"Consolidated Opinion: Failed ({self.opinion_error})\n")
-
-                    flowchart_image_path = self.flowchart_image_path
-                    if flowchart_image_path is None:
-                        candidate = self.output_dir / "business_flowchart.png"
-                        if candidate.exists():
-                            flowchart_image_path = candidate
-                            self.flowchart_image_path = candidate
-
-                    if self.flowchart_mmd_path or self.flowchart_error or self.flowchart_rendered:
-                        if self.flowchart_rendered and flowchart_image_path and flowchart_image_path.exists():
-                            f.write(f"Flowchart Image: {flowchart_image_path.name}\n")
-                        elif self.flowchart_error:
-                            f.write(f"Flowchart Image: Failed ({self.flowchart_error})\n")
-                        if self.flowchart_mmd_path:
-                            f.write(f"Flowchart Source: {self.flowchart_mmd_path.name}\n")
-                    f.write("\n")
-
-                    f.write("2. Comment Statistics\n")
-                    f.write("-" * 60 + "\n")
-                    f.write(f"Added Successfully: {len(self.comments_added)}\n")
-                    if len(self.comments_added) > 0:
-                        precise_rate = len(precise_matches) / len(self.comments_added) * 100
-                        f.write(f"  - Exact Match: {len(precise_matches)} ({precise_rate:.1f}%)\n")
-                        f.write(f"  - Fallback: {len(fallback_matches)} ({100-precise_rate:.1f}%)\n")
-                    f.write(f"Failed: {len(comment_failures)}\n")
-                    total_attempts = len(self.comments_added) + len(comment_failures)
-                    success_rate = len(self.comments_added) / total_attempts * 100 if total_attempts else 0
-                    f.write(f"Success Rate: {success_rate:.1f}%\n\n")
-
-                    section_index = 3
-                    if fallback_matches:
-                        f.write(f"{section_index}. Fallback Comment Details\n")
-                        f.write("-" * 60 + "\n")
-                        f.write(
-                            f"{len(fallback_matches)} comments were added to the document title because no exact match was found.\n\n"
-                        )
-                        for i, comment in enumerate(fallback_matches, 1):
-                            f.write(f"{i}. Search Text: {comment['search']}\n")
-                            f.write(f"   Risk Level: {comment['risk_level']}\n\n")
-                        f.write("Note: These comments may require manual location in the document.\n\n")
-                        section_index += 1
-
-                    if comment_failures:
-                        f.write(f"{section_index}. Failed Comment Details\n")
-                        f.write("-" * 60 + "\n")
-                        for i, failed in enumerate(comment_failures, 1):
-                            f.write(f"{i}. Search Text: {failed['search']}\n")
-                            f.write(f"   Failure Reason: {failed['reason']}\n\n")
-                        section_index += 1
-
-                    if other_failures:
-                        f.write(f"{section_index}. Other Step Errors\n")
-                        f.write("-" * 60 + "\n")
-                        for i, failed in enumerate(other_failures, 1):
-                            f.write(f"{i}. Step: {failed.get('step', 'unknown')}\n")
-                            f.write(f"   Error: {failed['error']}\n\n")
-                        section_index += 1
-
-                    verification = self.doc.verify_comments()
-                    f.write(f"\n{section_index}. Verification Results\n")
-                    f.write("-" * 60 + "\n")
-                    f.write(f"Total Comments: {verification['total']}\n")
-                    f.write(f"References Found: {verification['found']}\n")
-                    f.write(f"Missing References: {verification['missing']}\n")
-                    section_index += 1
-
-                    if verification['comment_list']:
-                        f.write(f"\n{section_index}. Comment List\n")
-                        f.write("-" * 60 + "\n")
-                        for i, comment in enumerate(verification['comment_list'], 1):
-                            f.write(f"{i}. [ID:{comment['id']}] {comment['author']}\n")
-                            f.write(f"   Preview: {comment['preview']}\n\n")
-
-                    f.write("\n" + "=" * 60 + "\n")
-                    f.write(f"Report Generated At: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    f.write("=" * 60 + "\n")
-                else:
-                    f.write("=" * 60 + "\n")
-                    f.write("合同审核批注报告\n")
-                    f.write("=" * 60 + "\n\n")
-
-                    # 基本信息
-                    f.write("一、基本信息\n")
-                    f.write("-" * 60 + "\n")
-                    f.write(f"审核人: {self.reviewer_name}\n")
-                    f.write(f"文档: {self.contract_path}\n")
-                    f.write(f"审核时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    f.write(f"执行时长: {duration:.2f} 秒\n")
-                    if self.summary_path or self.summary_error:
-                        if self.summary_path:
-                            f.write(f"合同概要: {self.summary_path.name}\n")
-                        elif self.summary_error:
-                            f.write(f"合同概要: 生成失败 ({self.summary_error})\n")
-                    if self.opinion_path or self.opinion_error:
-                        if self.opinion_path:
-                            f.write(f"综合审核意见: {self.opinion_path.name}\n")
-                        elif self.opinion_error:
-                            f.write(f"综合审核意见: 生成失败 ({self.opinion_error})\n")
-                    flowchart_image_path = self.flowchart_image_path
-                    if flowchart_image_path is None:
-                        candidate = self.output_dir / "business_flowchart.png"
-                        if candidate.exists():
-                            flowchart_image_path = candidate
-                            self.flowchart_image_path = candidate
-
-                    if self.flowchart_mmd_path or self.flowchart_error or self.flowchart_rendered:
-                        if self.flowchart_rendered and flowchart_image_path and flowchart_image_path.exists():
-                            f.write(f"流程图图片: {flowchart_image_path.name}\n")
-                        elif self.flowchart_error:
-                            f.write(f"流程图图片: 生成失败 ({self.flowchart_error})\n")
-                        if self.flowchart_mmd_path:
-                            f.write(f"流程图源码: {self.flowchart_mmd_path.name}\n")
-                    f.write("\n")
-
-                    # 批注统计
-                    f.write("二、批注统计\n")
-                    f.write("-" * 60 + "\n")
-                    f.write(f"成功添加: {len(self.comments_added)} 个\n")
-
-                    if len(self.comments_added) > 0:
-                        precise_rate = len(precise_matches) / len(self.comments_added) * 100
-                        f.write(f"  ├── 精准匹配: {len(precise_matches)} 个 ({precise_rate:.1f}%)\n")
-                        f.write(f"  └── Fallback: {len(fallback_matches)} 个 ({100-precise_rate:.1f}%)\n")
-
-                    f.write(f"添加失败: {len(comment_failures)} 个\n")
-                    total_attempts = len(self.comments_added) + len(comment_failures)
-                    success_rate = len(self.comments_added) / total_attempts * 100 if total_attempts else 0
-                    f.write(f"成功率: {success_rate:.1f}%\n\n")
-
-                    section_index = 3
-                    if fallback_matches:
-                        f.write(f"{_section_cn(section_index)}、Fallback批注详情\n")
-                        f.write("-" * 60 + "\n")
-                        f.write(f"以下{len(fallback_matches)}个批注因未找到精确匹配,已添加到文档标题:\n\n")
-                        for i, comment in enumerate(fallback_matches, 1):
-                            f.write(f"{i}. 搜索文本: {comment['search']}\n")
-                            f.write(f"   风险等级: {comment['risk_level']}\n\n")
-                        f.write("注意: 这些批注可能需要您手动定位到相关条款。\n\n")
-                        section_index += 1
-
-                    if comment_failures:
-                        f.write(f"{_section_cn(section_index)}、失败批注详情\n")
-                        f.write("-" * 60 + "\n")
-                        for i, failed in enumerate(comment_failures, 1):
-                            f.write(f"{i}. 搜索文本: {failed['search']}\n")
-                            f.write(f"   失败原因: {failed['reason']}\n\n")
-                        section_index += 1
-
-                    if other_failures:
-                        f.write(f"{_section_cn(section_index)}、其他步骤错误\n")
-                        f.write("-" * 60 + "\n")
-                        for i, failed in enumerate(other_failures, 1):
-                            f.write(f"{i}. 步骤: {failed.get('step', 'unknown')}\n")
-                            f.write(f"   错误信息: {failed['error']}\n\n")
-                        section_index += 1
-
-                    verification = self.doc.verify_comments()
-                    f.write(f"\n{_section_cn(section_index)}、验证结果\n")
-                    section_index += 1
-
-                    f.write("-" * 60 + "\n")
-                    f.write(f"批注总数: {verification['total']}\n")
-                    f.write(f"文档引用: {verification['found']}\n")
-                    f.write(f"缺失引用: {verification['missing']}\n")
-
-                    if verification['comment_list']:
-                        f.write(f"\n{_section_cn(section_index)}、批注列表\n")
-
-                        f.write("-" * 60 + "\n")
-                        for i, comment in enumerate(verification['comment_list'], 1):
-                            f.write(f"{i}. [ID:{comment['id']}] {comment['author']}\n")
-                            f.write(f"   预览: {comment['preview']}\n\n")
-
-                    f.write("\n" + "=" * 60 + "\n")
-                    f.write(f"报告生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    f.write("=" * 60 + "\n")
+            labels = _REPORT_LABELS["en" if self.output_language == "en" else "zh"]
+            section_number = labels['section_number']
+
+            def heading(index: int, key: str) -> str:
+                return labels['heading'].format(number=section_number(index), title=labels[key]) + _DASH_LINE
+
+            verification = self._get_verification()
+
+            # 报告内容先在内存中拼接,最后一次性写入文件
+            parts = []  # type: List[str]
+            write = parts.append
+
+            # 基本信息
+            write(
+                f"{_EQ_LINE}{labels['title']}\n{_EQ_LINE}\n"
+                f"{heading(1, 'basic_info')}"
+                f"{labels['reviewer']}: {self.reviewer_name}\n"
+                f"{labels['document']}: {self.contract_path}\n"
+                f"{labels['review_time']}: {now_str}\n"
+                f"{labels['duration'].format(seconds=duration)}\n"
+            )
+            if self.summary_path:
+                write(f"{labels['summary']}: {self.summary_path.name}\n")
+            elif self.summary_error:
+                write(f"{labels['summary']}: {labels['failed'].format(error=self.summary_error)}\n")
+            if self.opinion_path:
+                write(f"{labels['opinion']}: {self.opinion_path.name}\n")
+            elif self.opinion_error:
+                write(f"{labels['opinion']}: {labels['failed'].format(error=self.opinion_error)}\n")
+
+            flowchart_image_path = self.flowchart_image_path
+            if flowchart_image_path is None:
+                candidate = self.output_dir / "business_flowchart.png"
+                if candidate.exists():
+                    flowchart_image_path = candidate
+                    self.flowchart_image_path = candidate
+
+            if self.flowchart_mmd_path or self.flowchart_error or self.flowchart_rendered:
+                if self.flowchart_rendered and flowchart_image_path and flowchart_image_path.exists():
+                    write(f"{labels['flowchart_image']}: {flowchart_image_path.name}\n")
+                elif self.flowchart_error:
+                    write(f"{labels['flowchart_image']}: {labels['failed'].format(error=self.flowchart_error)}\n")
+                if self.flowchart_mmd_path:
+                    write(f"{labels['flowchart_source']}: {self.flowchart_mmd_path.name}\n")
+
+            # 批注统计
+            added_count = len(self.comments_added)
+            match_breakdown = ""
+            if added_count > 0:
+                precise_rate = precise_count / added_count * 100
+                match_breakdown = (
+                    labels['exact_match'].format(count=precise_count, rate=precise_rate) + "\n"
+                    + labels['fallback_match'].format(count=len(fallback_matches), rate=100 - precise_rate) + "\n"
+                )
+            total_attempts = added_count + len(comment_failures)
+            success_rate = added_count / total_attempts * 100 if total_attempts else 0
+            write(
+                f"\n{heading(2, 'statistics')}"
+                f"{labels['added'].format(count=added_count)}\n"
+                f"{match_breakdown}"
+                f"{labels['failed_count'].format(count=len(comment_failures))}\n"
+                f"{labels['success_rate']}: {success_rate:.1f}%\n\n"
+            )
+
+            section_index = 3
+            if fallback_matches:
+                write(
+                    f"{heading(section_index, 'fallback_details')}"
+                    f"{labels['fallback_intro'].format(count=len(fallback_matches))}\n\n"
+                )
+                write("".join(
+                    labels['fallback_entry'].format(index=i, search=comment['search'], risk_level=comment['risk_level'])
+                    for i, comment in enumerate(fallback_matches, 1)
+                ))
+                write(f"{labels['fallback_note']}\n\n")
+                section_index += 1
+
+            if comment_failures:
+                write(heading(section_index, 'failure_details'))
+                write("".join(
+                    labels['failure_entry'].format(index=i, search=failed['search'], reason=failed['reason'])
+                    for i, failed in enumerate(comment_failures, 1)
+                ))
+                section_index += 1
+
+            if other_failures:
+                write(heading(section_index, 'other_errors'))
+                write("".join(
+                    labels['other_entry'].format(index=i, step=failed.get('step', 'unknown'), error=failed['error'])
+                    for i, failed in enumerate(other_failures, 1)
+                ))
+                section_index += 1
+
+            # 验证结果
+            write(
+                f"\n{heading(section_index, 'verification')}"
+                f"{labels['total_comments']}: {verification['total']}\n"
+                f"{labels['references_found']}: {verification['found']}\n"
+                f"{labels['missing_references']}: {verification['missing']}\n"
+            )
+            section_index += 1
+
+            if verification['comment_list']:
+                write(f"\n{heading(section_index, 'comment_list')}")
+                write("".join(
+                    labels['comment_entry'].format(
+                        index=i, id=comment['id'], author=comment['author'], preview=comment['preview']
+                    )
+                    for i, comment in enumerate(verification['comment_list'], 1)
+                ))
+
+            write(f"\n{_EQ_LINE}{labels['generated_at']}: {now_str}\n{_EQ_LINE}")
+
+            report_text = "".join(parts)
+            if os.linesep != "\n":
+                # 与文本模式写入保持一致的平台换行符
+                report_text = report_text.replace("\n", os.linesep)
+            # 一次编码为UTF-8字节后直接写入,绕过文本层的增量编码
+            Path(report_path).write_bytes(report_text.encode('utf-8'))
 
             print(f"✓ 报告已生成: {report_path}")
             return True
@@ -1000,44 +1199,45 @@ class ContractReviewWorkflow:
         Returns:
             Path: 最终输出目录路径(即self.output_dir)
         """
-        print(f"\n{'='*60}")
+        print(f"\n{_H_RULE}")
         print(f"步骤10: 清理输出文件")
-        print(f"{'='*60}")
+        print(_H_RULE)
         print(f"🧹 清理中间文件,只保留最终结果...")
 
         try:
             # 最终输出目录就是当前工作目录
             final_output_dir = self.output_dir
+            is_en = self.output_language == "en"
+            original_name = self.contract_path.stem
 
             # 重命名审核后的合同
-            source_docx = self.output_dir / output_docx_filename
-            original_name = self.contract_path.stem
-            if self.output_language == "en":
+            source_docx = final_output_dir / output_docx_filename
+            if is_en:
                 target_docx = final_output_dir / f"{original_name}_Reviewed.docx"
             else:
                 target_docx = final_output_dir / f"{original_name}_审核版.docx"
 
-            if source_docx.exists() and source_docx != target_docx:
-                shutil.move(str(source_docx), str(target_docx))
-                print(f"✓ 已重命名审核后的合同: {target_docx.name}")
-            elif source_docx.exists():
-                print(f"✓ 审核后的合同: {target_docx.name}")
+            if source_docx.exists():
+                if source_docx != target_docx:
+                    # 源与目标同在输出目录内,一次rename即可
+                    os.replace(source_docx, target_docx)
+                    print(f"✓ 已重命名审核后的合同: {target_docx.name}")
+                else:
+                    print(f"✓ 审核后的合同: {target_docx.name}")
 
             # 重命名审核报告
-            source_report = self.output_dir / report_filename
-            if self.output_language == "en":
-                target_report = final_output_dir / "Review_Report.txt"
-            else:
-                target_report = final_output_dir / "审核报告.txt"
+            source_report = final_output_dir / report_filename
+            target_report = final_output_dir / ("Review_Report.txt" if is_en else "审核报告.txt")
 
-            if source_report.exists() and source_report != target_report:
-                shutil.move(str(source_report), str(target_report))
-                print(f"✓ 已重命名审核报告: {target_report.name}")
-            elif source_report.exists():
-                print(f"✓ 审核报告: {target_report.name}")
+            if source_report.exists():
+                if source_report != target_report:
+                    os.replace(source_report, target_report)
+                    print(f"✓ 已重命名审核报告: {target_report.name}")
+                else:
+                    print(f"✓ 审核报告: {target_report.name}")
 
             # 删除unpacked临时目录
-            unpacked_dir = self.output_dir / "unpacked"
+            unpacked_dir = final_output_dir / "unpacked"
             if unpacked_dir.exists():
                 try:
                     shutil.rmtree(unpacked_dir)
@@ -1053,18 +1253,19 @@ class ContractReviewWorkflow:
                 target_report.name,
             ]
 
-            if self.summary_path and self.summary_path.exists():
+            presence = self._get_output_presence()
+            if presence['summary']:
                 output_files.append(self.summary_path.name)
-            if self.opinion_path and self.opinion_path.exists():
+            if presence['opinion']:
                 output_files.append(self.opinion_path.name)
-            if self.flowchart_rendered and self.flowchart_image_path and self.flowchart_image_path.exists():
+            if presence['flowchart_image']:
                 output_files.append(self.flowchart_image_path.name)
-            if self.flowchart_mmd_path and self.flowchart_mmd_path.exists():
+            if presence['flowchart_mmd']:
                 output_files.append(self.flowchart_mmd_path.name)
 
-            print(f"  📄 包含文件:")
-            for i, filename in enumerate(output_files, 1):
-                print(f"    {i}. {filename}")
+            print(f"  📄 包含文件:\n" + "\n".join(
+                f"    {i}. {filename}" for i, filename in enumerate(output_files, 1)
+            ))
 
             return final_output_dir
 
@@ -1113,7 +1314,7 @@ class ContractReviewWorkflow:
             summary_text: 合同概要文本(如提供则输出概要文件)
             summary_filename: 合同概要文件名
             summary_font: 合同概要字体(默认仿宋)
-            parallel_outputs: 是否并行生成概要/意见/流程图(默认True)
+            parallel_outputs: 是否与批注步骤并行生成概要/意见/流程图(默认True)
             opinion_text: 综合审核意见文本(如提供则输出意见文件)
             opinion_filename: 综合审核意见文件名
             opinion_font: 综合审核意见字体(默认仿宋)
@@ -1132,14 +1333,19 @@ class ContractReviewWorkflow:
             3. 这些格式问题不影响Word正常使用,但会导致验证失败
             4. 如需严格验证,可手动设置validate_doc=True
         """
-        print("\n" + "=" * 60)
+        print("\n" + _H_RULE)
         print("合同审核工作流程")
         print("Contract Review Workflow")
-        print("=" * 60)
+        print(_H_RULE)
 
         output_language = _detect_output_language(summary_text, opinion_text, flowchart_mermaid)
         if output_language is None:
-            output_language = _detect_output_language_from_contract(self.contract_path)
+            # 合同部件只解压一次:语言检测与步骤1解包共用
+            try:
+                self._contract_parts = unpack_document_to_dict(str(self.contract_path))
+            except Exception:
+                self._contract_parts = None
+            output_language = _detect_output_language_from_contract(self.contract_path, self._contract_parts)
         if output_language is None:
             output_language = "en"
         self.output_language = output_language
@@ -1175,58 +1381,59 @@ class ContractReviewWorkflow:
         if not self.step2_initialize():
             return False
 
-        if not self.step3_add_comments(comments):
-            print("\n⚠️  部分批注添加失败,但继续保存...")
-            success = False
+        # 概要/意见/流程图只依赖文本与输出目录,在后台线程中与批注步骤(3-5)并行生成,
+        # 其控制台信息先写入各自的缓冲区,步骤5之后按顺序打印
+        output_tasks = {}
+        executor = None
+        pending_outputs = []
+        if summary_text:
+            pending_outputs.append(
+                ("summary", self.step6_generate_summary, (summary_text, summary_filename, summary_font))
+            )
+        if opinion_text:
+            pending_outputs.append(
+                ("opinion", self.step7_generate_opinion, (opinion_text, opinion_filename, opinion_font))
+            )
+        if flowchart_mermaid:
+            pending_outputs.append((
+                "flowchart",
+                self.step6_generate_flowchart,
+                (flowchart_mermaid, flowchart_mmd_filename, flowchart_image_filename, render_flowchart),
+            ))
 
-        verification = self.step4_verify()
-        if verification['missing'] > 0:
-            print("\n⚠️  验证发现问题,但继续保存...")
-            success = False
+        try:
+            if parallel_outputs and len(pending_outputs) > 1:
+                # 线程数与任务数一致;只有一个任务时不建线程池,在步骤5之后直接执行
+                executor = ThreadPoolExecutor(max_workers=len(pending_outputs))
+                for step_name, step, args in pending_outputs:
+                    output_tasks[executor.submit(self._run_output_step, step, *args)] = step_name
+
+            if not self.step3_add_comments(comments):
+                print("\n⚠️  部分批注添加失败,但继续保存...")
+                success = False
 
-        if not self.step5_save(output_docx_filename, validate=validate_doc):
-            return False
+            verification = self.step4_verify()
+            if verification['missing'] > 0:
+                print("\n⚠️  验证发现问题,但继续保存...")
+                success = False
 
-        if parallel_outputs and (summary_text or opinion_text or flowchart_mermaid):
-            tasks = {}
-            with ThreadPoolExecutor(max_workers=3) as executor:
-                if summary_text:
-                    tasks[executor.submit(
-                        self.step6_generate_summary,
-                        summary_text,
-                        summary_filename,
-                        summary_font,
-                    )] = "summary"
-                if opinion_text:
-                    tasks[executor.submit(
-                        self.step7_generate_opinion,
-                        opinion_text,
-                        opinion_filename,
-                        opinion_font,
-                    )] = "opinion"
-                if flowchart_mermaid:
-                    tasks[executor.submit(
-                        self.step6_generate_flowchart,
-                        flowchart_mermaid,
-                        flowchart_mmd_filename,
-                        flowchart_image_filename,
-                        render_flowchart,
-                    )] = "flowchart"
-
-                for future in as_completed(tasks):
-                    try:
-                        ok = future.result()
-                    except Exception as e:
-                        ok = False
-                        step_name = tasks[future]
-                        self.comments_failed.append({
-                            'step': step_name,
-                            'error': str(e)
-                        })
-                        print(f"✗ 输出生成失败: {step_name} - {e}")
+            if not self.step5_save(output_docx_filename, validate=validate_doc):
+                return False
+        finally:
+            # 提前返回时也等待后台输出写完,不留下半成品文件
+            if executor is not None:
+                executor.shutdown(wait=True)
+                # 报告需要概要/意见/流程图的结果,在此按提交顺序汇总并打印缓冲的输出
+                for future, step_name in output_tasks.items():
+                    ok, error, output = future.result()
+                    print(output, end="")
+                    if error is not None:
+                        self._record_step_failure(step_name, error)
+                        print(f"✗ 输出生成失败: {step_name} - {error}")
                     if not ok:
                         success = False
-        else:
+
+        if executor is None:
             if not self.step6_generate_summary(summary_text, summary_filename, summary_font):
                 success = False
 
@@ -1270,52 +1477,54 @@ class ContractReviewWorkflow:
             final_docx = final_output_dir / output_docx_filename
             final_report = final_output_dir / report_filename
 
-        # 最终总结
-        print("\n" + "=" * 60)
-        print("工作流程完成!")
-        print("=" * 60)
-        print(f"\n📊 最终统计:")
-        print(f"  ✓ 成功添加批注: {len(self.comments_added)} 个")
+        # 最终总结:逐行收集后一次输出
+        summary_lines = []  # type: List[str]
+        add = summary_lines.append
+        add("\n" + _H_RULE)
+        add("工作流程完成!")
+        add(_H_RULE)
+        add(f"\n📊 最终统计:")
+        add(f"  ✓ 成功添加批注: {len(self.comments_added)} 个")
         comment_failures = [c for c in self.comments_failed if 'search' in c]
-        print(f"  ✗ 添加失败: {len(comment_failures)} 个")
+        add(f"  ✗ 添加失败: {len(comment_failures)} 个")
 
         # 统计精准匹配和fallback
-        precise_matches = [c for c in self.comments_added if not c.get('fallback_used', False)]
-        fallback_matches = [c for c in self.comments_added if c.get('fallback_used', False)]
 
         if len(self.comments_added) > 0:
-            precise_rate = len(precise_matches) / len(self.comments_added) * 100
-            print(f"\n精准匹配情况:")
-            print(f"  🎯 精准匹配: {len(precise_matches)} 个 ({precise_rate:.1f}%)")
-            print(f"  🔄 Fallback: {len(fallback_matches)} 个 ({100-precise_rate:.1f}%)")
-
-        print(f"\n📁 最终输出:")
-        print(f"  📄 审核后的合同: {final_docx}")
-        print(f"  📋 审核报告: {final_report}")
+            precise_rate = self._precise_count / len(self.comments_added) * 100
+            add(f"\n精准匹配情况:")
+            add(f"  🎯 精准匹配: {self._precise_count} 个 ({precise_rate:.1f}%)")
+            add(f"  🔄 Fallback: {len(self._fallback_matches)} 个 ({100-precise_rate:.1f}%)")
+
+        add(f"\n📁 最终输出:")
+        add(f"  📄 审核后的合同: {final_docx}")
+        add(f"  📋 审核报告: {final_report}")
         if summary_text:
             if self.summary_path:
-                print(f"  🧾 合同概要: {self.summary_path}")
+                add(f"  🧾 合同概要: {self.summary_path}")
             elif self.summary_error:
-                print(f"  ⚠️ 合同概要生成失败: {self.summary_error}")
+                add(f"  ⚠️ 合同概要生成失败: {self.summary_error}")
         if opinion_text:
             if self.opinion_path:
-                print(f"  📝 综合审核意见: {self.opinion_path}")
+                add(f"  📝 综合审核意见: {self.opinion_path}")
             elif self.opinion_error:
-                print(f"  ⚠️ 综合审核意见生成失败: {self.opinion_error}")
+                add(f"  ⚠️ 综合审核意见生成失败: {self.opinion_error}")
         if flowchart_mermaid:
-            if self.flowchart_rendered and self.flowchart_image_path and self.flowchart_image_path.exists():
-                print(f"  🗺️ 业务流程图: {self.flowchart_image_path}")
+            if self._get_output_presence()['flowchart_image']:
+                add(f"  🗺️ 业务流程图: {self.flowchart_image_path}")
             elif self.flowchart_error:
-                print(f"  ⚠️ 业务流程图生成失败: {self.flowchart_error}")
+                add(f"  ⚠️ 业务流程图生成失败: {self.flowchart_error}")
             if self.flowchart_mmd_path:
-                print(f"  🧾 Mermaid源文件: {self.flowchart_mmd_path}")
-        print(f"  📂 输出目录: {final_output_dir}")
-        print(f"  ⏱️  总耗时: {(datetime.now() - self.start_time).total_seconds():.2f} 秒")
+                add(f"  🧾 Mermaid源文件: {self.flowchart_mmd_path}")
+        add(f"  📂 输出目录: {final_output_dir}")
+        add(f"  ⏱️  总耗时: {(datetime.now() - self.start_time).total_seconds():.2f} 秒")
 
         if success:
-            print(f"\n✅ 所有步骤执行成功!")
+            add(f"\n✅ 所有步骤执行成功!")
         else:
-            print(f"\n⚠️  工作流程完成,但部分步骤存在问题,请查看报告详情。")
+            add(f"\n⚠️  工作流程完成,但部分步骤存在问题,请查看报告详情。")
+
+        print("\n".join(summary_lines))
 
         return success
 